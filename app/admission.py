@@ -0,0 +1,121 @@
+from starlette.concurrency import run_in_threadpool
+from database.connection import DatabaseConnection, DatabaseErrorException
+from app.profiling import profile_worker_thread
+from typing import Dict, Any, Callable
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class AdmissionLane:
+    """Concurrency limit for one class of database work.
+
+    At most max_inflight operations run at once and at most max_queue wait behind them.
+    A request is shed with a 503 when the queue is full, when its estimated wait
+    (queue depth x average service time) exceeds the latency budget, or when it
+    actually waits longer than the budget.
+    """
+    def __init__(self, name: str, max_inflight: int, max_queue: int, latency_budget_ms: float):
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.latency_budget = latency_budget_ms / 1000
+        self.inflight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.avg_service_time = 0.0
+        self._semaphore = asyncio.Semaphore(max_inflight)
+
+    def _shed(self, reason: str):
+        self.shed += 1
+        logger.warning(f"Shedding request in lane '{self.name}': {reason}")
+        return DatabaseErrorException(
+            message="Server is overloaded. Please try again later.",
+            status_code=503,
+            error_code="SERVER_OVERLOADED",
+            retry_after=1
+        )
+
+    async def acquire(self) -> None:
+        # Posición en la cola si se admite ahora; waiting cuenta también a quien aún no tomó el semáforo
+        position = self.inflight + self.waiting + 1 - self.max_inflight
+        if position > 0:
+            if position > self.max_queue:
+                raise self._shed("wait queue is full")
+            estimated_wait = position / self.max_inflight * self.avg_service_time
+            if estimated_wait > self.latency_budget:
+                raise self._shed(f"estimated wait {estimated_wait * 1000:.0f} ms exceeds budget")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.latency_budget)
+        except asyncio.TimeoutError:
+            raise self._shed("waited longer than the latency budget")
+        finally:
+            self.waiting -= 1
+        self.inflight += 1
+        self.admitted += 1
+
+    def release(self, service_time: float) -> None:
+        self.inflight -= 1
+        # Media móvil exponencial del tiempo de servicio
+        self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * service_time if self.avg_service_time else service_time
+        self._semaphore.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "latency_budget_ms": self.latency_budget * 1000,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "avg_service_ms": round(self.avg_service_time * 1000, 3)
+        }
+
+
+def _run_with_connection(func: Callable, *args):
+    with profile_worker_thread(), DatabaseConnection().checkout():
+        return func(*args)
+
+
+class AdmissionController:
+    """Sits between the routes and TaskCRUD; point reads and writes do not queue behind list scans"""
+    POINT = "point"
+    SCAN = "scan"
+
+    def __init__(self):
+        self.lanes = {
+            self.POINT: AdmissionLane(
+                self.POINT,
+                max_inflight=int(os.getenv('ADMISSION_POINT_MAX_INFLIGHT', '6')),
+                max_queue=int(os.getenv('ADMISSION_POINT_MAX_QUEUE', '64')),
+                latency_budget_ms=float(os.getenv('ADMISSION_POINT_BUDGET_MS', '500'))
+            ),
+            self.SCAN: AdmissionLane(
+                self.SCAN,
+                max_inflight=int(os.getenv('ADMISSION_SCAN_MAX_INFLIGHT', '2')),
+                max_queue=int(os.getenv('ADMISSION_SCAN_MAX_QUEUE', '16')),
+                latency_budget_ms=float(os.getenv('ADMISSION_SCAN_BUDGET_MS', '2000'))
+            )
+        }
+        # Cada operación admitida tiene su propia conexión del pool
+        DatabaseConnection.reserve_connections("admission", sum(lane.max_inflight for lane in self.lanes.values()))
+
+    async def run(self, lane_name: str, func: Callable, *args):
+        """Run a TaskCRUD call in a worker thread on its own pooled connection, once admitted"""
+        lane = self.lanes[lane_name]
+        await lane.acquire()
+        start = time.perf_counter()
+        try:
+            return await run_in_threadpool(_run_with_connection, func, *args)
+        finally:
+            lane.release(time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: lane.snapshot() for name, lane in self.lanes.items()}
+
+admission = AdmissionController()
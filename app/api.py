@@ -1,7 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
 from schemas.task import TaskCreate, TaskUpdate, TaskResponse
 from app.crud import TaskCRUD, DatabaseErrorException
-from typing import List, Dict, Any
+from app.startup import readiness
+from app.health import prober
+from app.admission import admission
+from app.cache import list_cache, task_list_adapter
+from app.profiling import request_profiler, debug_enabled
+from database.profiling import query_profiler
+from database.connection import DatabaseConnection
+from typing import List, Dict, Any, Optional
 import logging
 import traceback
 from datetime import datetime
@@ -14,7 +22,8 @@ router = APIRouter(
     responses={
         400: {"description": "Bad Request"},
         404: {"description": "Not Found"},
-        500: {"description": "Internal Server Error"}
+        500: {"description": "Internal Server Error"},
+        503: {"description": "Database unavailable or server overloaded"}
     }
 )
 
@@ -31,17 +40,30 @@ def handle_database_exception(e: DatabaseErrorException) -> Dict[str, Any]:
         error_response["debug_info"] = str(e)
     return error_response
 
+def database_error_headers(e: DatabaseErrorException) -> Optional[Dict[str, str]]:
+    """Retry-After header for errors raised while the database circuit is open"""
+    if e.retry_after:
+        return {"Retry-After": str(e.retry_after)}
+    return None
+
 @router.get("/", response_model=List[TaskResponse], 
-           summary="Get all tasks", description="Retrieve all tasks from the database")
-async def get_all_items(request: Request):
-    """Get all tasks"""
+           summary="Get all tasks", description="Retrieve all tasks from the database. "
+                                                "Use include_archived=true to also return archived tasks")
+async def get_all_items(request: Request, include_archived: bool = False):
+    """Get all tasks, served from the list cache when no write happened since it was computed"""
     try:
-        tasks = TaskCRUD.get_all_tasks()
-        return tasks
+        key = list_cache.key_for({"include_archived": include_archived})
+        body = list_cache.get(key)
+        if body is None:
+            generation = list_cache.generation
+            tasks = await admission.run(admission.SCAN, TaskCRUD.get_all_tasks, include_archived)
+            body = task_list_adapter.dump_json(task_list_adapter.validate_python(tasks))
+            list_cache.put(key, generation, body)
+        return Response(content=body, media_type="application/json")
     except DatabaseErrorException as e:
         logger.error(f"Database error in get_all_items: {e.message}")
         raise HTTPException(
-            status_code=e.status_code, detail=handle_database_exception(e) )
+            status_code=e.status_code, detail=handle_database_exception(e), headers=database_error_headers(e) )
     except Exception as e:
         logger.error(f"Unexpected error in get_all_items: {str(e)}")
         logger.error(traceback.format_exc())
@@ -51,15 +73,15 @@ async def get_all_items(request: Request):
             }
         )
 
-@router.get("/{item_id}",  response_model=TaskResponse, summary="Get task by ID", description="Retrieve a specific task by its ID",
+@router.get("/{item_id}",  response_model=TaskResponse, summary="Get task by ID", description="Retrieve a specific task by its ID. Use include_archived=true to also look in the archive",
            responses={
                404: {"description": "Task not found"},
                400: {"description": "Invalid task ID"}
            })
-async def get_item(item_id: int, request: Request):
+async def get_item(item_id: int, request: Request, include_archived: bool = False):
     """Get a specific task by ID"""
     try:
-        task = TaskCRUD.get_task_by_id(item_id)
+        task = await admission.run(admission.POINT, TaskCRUD.get_task_by_id, item_id, include_archived)
         if not task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -68,7 +90,8 @@ async def get_item(item_id: int, request: Request):
         return task
     except DatabaseErrorException as e:
         logger.error(f"Database error in get_item: {e.message}")
-        raise HTTPException( status_code=e.status_code, detail=handle_database_exception(e)
+        raise HTTPException( status_code=e.status_code, detail=handle_database_exception(e),
+            headers=database_error_headers(e)
         )
     except HTTPException:
         raise   
@@ -93,13 +116,14 @@ async def get_item(item_id: int, request: Request):
 async def create_item(task: TaskCreate, request: Request):
     """Create a new task"""
     try:
-        created_task = TaskCRUD.create_task(task)
+        created_task = await admission.run(admission.POINT, TaskCRUD.create_task, task)
         return created_task
     except DatabaseErrorException as e:
         logger.error(f"Database error in create_item: {e.message}")
         raise HTTPException(
             status_code=e.status_code,
-            detail=handle_database_exception(e)
+            detail=handle_database_exception(e),
+            headers=database_error_headers(e)
         )
     except Exception as e:
         logger.error(f"Unexpected error in create_item: {str(e)}")
@@ -124,7 +148,7 @@ async def create_item(task: TaskCreate, request: Request):
 async def update_item(item_id: int, task_update: TaskUpdate, request: Request):
     """Update an existing task with"""
     try:
-        updated_task = TaskCRUD.update_task(item_id, task_update)
+        updated_task = await admission.run(admission.POINT, TaskCRUD.update_task, item_id, task_update)
         if not updated_task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -139,7 +163,8 @@ async def update_item(item_id: int, task_update: TaskUpdate, request: Request):
         logger.error(f"Database error in update_item: {e.message}")
         raise HTTPException(
             status_code=e.status_code,
-            detail=handle_database_exception(e)
+            detail=handle_database_exception(e),
+            headers=database_error_headers(e)
         )
     except HTTPException:
         raise
@@ -166,7 +191,7 @@ async def update_item(item_id: int, task_update: TaskUpdate, request: Request):
 async def delete_item(item_id: int, request: Request):
     """Delete a task with"""
     try:
-        deleted = TaskCRUD.delete_task(item_id)
+        deleted = await admission.run(admission.POINT, TaskCRUD.delete_task, item_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -182,7 +207,8 @@ async def delete_item(item_id: int, request: Request):
         logger.error(f"Database error in delete_item: {e.message}")
         raise HTTPException(
             status_code=e.status_code,
-            detail=handle_database_exception(e)
+            detail=handle_database_exception(e),
+            headers=database_error_headers(e)
         )
         
     except HTTPException:
@@ -202,38 +228,90 @@ async def delete_item(item_id: int, request: Request):
 
 @router.get("/health/check", 
            summary="Health check",
-           description="Check the health status of the API and database connection")
-async def health_check():
-    """Health check endpoint with database connectivity test"""
-    try:
-        # Intentar obtener una conexión a la base de datos
-        from database.connection import get_db_connection
-        connection = get_db_connection()
-        
-        # Ejecutar una consulta simple para verificar la conectividad
-        cursor = connection.cursor()
-        cursor.execute("SELECT 1")
-        result = cursor.fetchone()
-        cursor.close()
-        
-        if result and result[0] == 1:
-            return {
-                "status": "healthy",
-                "database": "connected",
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            return {
-                "status": "unhealthy",
-                "database": "query_failed",
-                "timestamp": datetime.now().isoformat()
-            }
-            
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+           description="Health status of the API and database connection, served from the background prober. "
+                       "Use deep=true to run a live database query")
+async def health_check(deep: bool = False):
+    """Health check endpoint, cached unless deep=true"""
+    if deep:
+        await prober.check()
+    return prober.snapshot()
+
+@router.get("/health/live",
+           summary="Liveness probe",
+           description="Check that the process is running and the startup phase has not failed")
+async def liveness():
+    """Liveness endpoint, never touches the database"""
+    if readiness.error:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "failed", "error": readiness.error, "timestamp": datetime.now().isoformat()}
+        )
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@router.get("/health/ready",
+           summary="Readiness probe",
+           description="Check that the startup warm-up finished and the instance can receive traffic")
+async def readiness_check():
+    """Readiness endpoint, only ready once the pool and validators are warm"""
+    content = {**readiness.snapshot(), "database": prober.status, "timestamp": datetime.now().isoformat()}
+    if not readiness.ready or prober.status == "unhealthy":
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
+
+@router.get("/health/metrics",
+           summary="Database metrics",
+           description="Circuit breaker, connection pool, admission control, list cache and database probe metrics")
+async def metrics():
+    """Metrics endpoint, served from in-memory state"""
+    return {
+        "circuit_breaker": DatabaseConnection().breaker.snapshot(),
+        "connection_pool": DatabaseConnection().pool_snapshot(),
+        "admission": admission.snapshot(),
+        "list_cache": list_cache.snapshot(),
+        "health_probe": {
+            "status": prober.status,
+            "latency_ms": prober.latency_ms,
+            "consecutive_failures": prober.consecutive_failures,
+            "total_checks": prober.total_checks
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _require_debug() -> None:
+    if not debug_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": True, "message": "Debug endpoints are disabled", "error_code": "DEBUG_DISABLED"}
+        )
+
+@router.get("/debug/queries",
+           summary="Query profile",
+           description="Per-statement timings and the slowest recent queries with their EXPLAIN plans when SLOW_QUERY_EXPLAIN=true")
+async def debug_queries():
+    """Query profiling data, only with debug endpoints enabled"""
+    _require_debug()
+    return query_profiler.snapshot()
+
+@router.get("/debug/profiles",
+           summary="Request profiles",
+           description="Recently sampled request profiles, requested with the X-Profile header. "
+                       "Only the worker-thread part of a request is profiled; the shared event loop is not")
+async def debug_profiles():
+    """List of sampled request profiles"""
+    _require_debug()
+    return [profile.summary() for profile in reversed(request_profiler.recent)]
+
+@router.get("/debug/profiles/{profile_id}",
+           summary="Request profile report",
+           description="cProfile report of a sampled request",
+           response_class=PlainTextResponse)
+async def debug_profile(profile_id: str):
+    """cProfile report sorted by cumulative time"""
+    _require_debug()
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": True, "message": f"Profile {profile_id} not found", "error_code": "PROFILE_NOT_FOUND"}
+        )
+    return PlainTextResponse(profile.report())
@@ -0,0 +1,199 @@
+"""Move old tasks from tasks to tasks_archive in small batches.
+
+    python -m app.archive --older-than-days 90 --batch-size 500 --pause-ms 50
+
+Rows are walked in (created_at, id) order with keyset pagination over idx_created_at,
+and each batch is copied and deleted in its own short transaction, so production
+traffic only ever waits on a few hundred row locks at a time.
+
+The archiver runs in its own process, so it cannot invalidate the API's list cache:
+archived rows drop out of GET /items once the cached entries expire after
+LIST_CACHE_TTL_SECONDS.
+"""
+from database.connection import DatabaseConnection, DatabaseErrorException
+from app.crud import TASK_COLUMNS
+from mysql.connector import Error
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+import mysql.connector
+import argparse
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class ReplicaLagUnavailable(Exception):
+    """ARCHIVE_REPLICA_HOST is set but its replication lag cannot be read"""
+
+
+class TaskArchiver:
+    """Batched, keyset-ordered archival of tasks created before a cutoff"""
+    def __init__(self, batch_size: int = 500, pause_seconds: float = 0.05, max_replica_lag: float = 5,
+                 max_replica_unavailable: float = 30):
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.max_replica_lag = max_replica_lag
+        self.max_replica_unavailable = max_replica_unavailable
+        self._replica = None
+
+    def _replica_lag(self) -> Optional[float]:
+        """Seconds_Behind_Source of ARCHIVE_REPLICA_HOST, or None when no replica is configured.
+
+        Raises ReplicaLagUnavailable when the replica is configured but its lag cannot be read:
+        a NULL Seconds_Behind_Source means replication is stopped, and SHOW REPLICA STATUS
+        needs the REPLICATION CLIENT privilege.
+        """
+        host = os.getenv('ARCHIVE_REPLICA_HOST')
+        if not host:
+            return None
+        try:
+            if self._replica is None or not self._replica.is_connected():
+                config = DatabaseConnection._db_config()
+                config.update(host=host, port=os.getenv('ARCHIVE_REPLICA_PORT', config["port"]), autocommit=True)
+                self._replica = mysql.connector.connect(**config)
+            cursor = self._replica.cursor(dictionary=True)
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+                status = cursor.fetchone()
+            finally:
+                cursor.close()
+        except Error as e:
+            raise ReplicaLagUnavailable(f"could not read replica status: {e}")
+        if not status:
+            raise ReplicaLagUnavailable(f"{host} is not a replica (SHOW REPLICA STATUS returned no rows)")
+        if status.get("Seconds_Behind_Source") is None:
+            raise ReplicaLagUnavailable("Seconds_Behind_Source is NULL, replication is stopped")
+        return float(status["Seconds_Behind_Source"])
+
+    def _wait_for_replica(self, report: Dict[str, Any]) -> None:
+        """Pause until the replica is within max_replica_lag.
+
+        An unreadable lag pauses archival too, and aborts it by raising ReplicaLagUnavailable
+        once it has stayed unreadable for max_replica_unavailable seconds.
+        """
+        unavailable_since = None
+        while True:
+            try:
+                lag = self._replica_lag()
+            except ReplicaLagUnavailable as e:
+                report["replica_lag_error"] = str(e)
+                if unavailable_since is None:
+                    unavailable_since = time.monotonic()
+                if time.monotonic() - unavailable_since >= self.max_replica_unavailable:
+                    raise
+                logger.warning(f"Replica lag unavailable ({e}), pausing archival")
+            else:
+                if lag is None:
+                    return
+                report["replica_lag_error"] = None
+                unavailable_since = None
+                report["max_replica_lag"] = max(report["max_replica_lag"] or 0, lag)
+                if lag <= self.max_replica_lag:
+                    return
+                logger.info(f"Replica lag {lag:.0f}s above {self.max_replica_lag:.0f}s, pausing archival")
+            time.sleep(1)
+            report["throttled_seconds"] += 1
+
+    def _move_batch(self, connection, cutoff: datetime, last_key) -> tuple:
+        """Copy and delete one batch in a single transaction, returns (rows moved, last key)"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT id, created_at FROM tasks "
+                "WHERE created_at < %s AND (created_at, id) > (%s, %s) "
+                "ORDER BY created_at, id LIMIT %s",
+                (cutoff, last_key[0], last_key[1], self.batch_size)
+            )
+            keys = cursor.fetchall()
+            if not keys:
+                connection.rollback()
+                return 0, last_key
+            ids = [row[0] for row in keys]
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(
+                f"INSERT INTO tasks_archive ({TASK_COLUMNS}) "
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({placeholders})",
+                tuple(ids)
+            )
+            cursor.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", tuple(ids))
+            moved = cursor.rowcount
+            connection.commit()
+            return moved, (keys[-1][1], keys[-1][0])
+        except Error:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def run(self, cutoff: datetime, max_batches: Optional[int] = None) -> Dict[str, Any]:
+        """Archive every task created before cutoff and return a report"""
+        report = {"cutoff": cutoff.isoformat(), "batches": 0, "rows_moved": 0, "rows_per_second": 0.0,
+                  "max_replica_lag": None, "replica_lag_error": None, "throttled_seconds": 0.0, "aborted": None}
+        last_key = (datetime.min, 0)
+        start = time.perf_counter()
+        db = DatabaseConnection()
+        with db.checkout() as connection:
+            while max_batches is None or report["batches"] < max_batches:
+                batch_start = time.perf_counter()
+                moved, next_key = self._move_batch(connection, cutoff, last_key)
+                if next_key == last_key:
+                    break
+                last_key = next_key
+                report["batches"] += 1
+                report["rows_moved"] += moved
+                batch_time = time.perf_counter() - batch_start
+                logger.info(f"Archived batch {report['batches']}: {moved} rows in {batch_time * 1000:.0f} ms")
+                time.sleep(self.pause_seconds)
+                # Esperar a que las réplicas se pongan al día antes del siguiente lote
+                try:
+                    self._wait_for_replica(report)
+                except ReplicaLagUnavailable as e:
+                    report["aborted"] = f"replica lag unavailable for {self.max_replica_unavailable:.0f}s: {e}"
+                    logger.error(f"Aborting archival: {report['aborted']}")
+                    break
+        elapsed = time.perf_counter() - start
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(report["rows_moved"] / elapsed, 1) if elapsed else 0.0
+        if self._replica is not None:
+            self._replica.close()
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old tasks to tasks_archive in small batches")
+    parser.add_argument("--older-than-days", type=int, required=True, help="archive tasks created before now minus this many days")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause-ms", type=float, default=50, help="pause between batches")
+    parser.add_argument("--max-replica-lag", type=float, default=5, help="seconds of replica lag before throttling")
+    parser.add_argument("--max-replica-unavailable", type=float, default=30,
+                        help="seconds the replica lag may stay unreadable before aborting")
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    cutoff = datetime.now() - timedelta(days=args.older_than_days)
+    archiver = TaskArchiver(args.batch_size, args.pause_ms / 1000, args.max_replica_lag, args.max_replica_unavailable)
+    try:
+        report = archiver.run(cutoff, args.max_batches)
+    except (DatabaseErrorException, Error) as e:
+        logger.error(f"Archival failed: {str(e)}")
+        raise SystemExit(1)
+    finally:
+        DatabaseConnection().close_connection()
+    lag = report["max_replica_lag"]
+    if not os.getenv('ARCHIVE_REPLICA_HOST'):
+        lag_text = "not measured (ARCHIVE_REPLICA_HOST not set)"
+    elif report["replica_lag_error"]:
+        lag_text = f"unavailable: {report['replica_lag_error']}"
+    else:
+        lag_text = "not measured" if lag is None else f"{lag:.0f}s"
+    print(f"Archived {report['rows_moved']} tasks older than {report['cutoff']} in {report['batches']} batches "
+          f"({report['rows_per_second']} rows/s, {report['elapsed_seconds']}s)")
+    print(f"Max replica lag: {lag_text}, throttled {report['throttled_seconds']:.0f}s")
+    if report["aborted"]:
+        print(f"Aborted: {report['aborted']}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from pydantic import TypeAdapter
+from schemas.task import TaskResponse
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+task_list_adapter = TypeAdapter(List[TaskResponse])
+
+class ListResultCache:
+    """Serialized GET /items responses, keyed by the parsed query parameters.
+
+    Every write bumps the table generation, which invalidates all entries at once.
+    Entries also expire after ttl_seconds so writes made by other instances show up.
+    Eviction is LRU, bounded by the total size of the cached bodies.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, Tuple[int, float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(params: Dict[str, Any]) -> Tuple:
+        """Key from the parsed query parameters, so ?a=1&b=true and ?b=1&a=1 share an entry"""
+        return tuple(sorted(params.items()))
+
+    def bump_generation(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.generation or time.monotonic() - entry[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Tuple, generation: int, body: bytes) -> None:
+        """Store a body computed at the given generation, unless a write happened meanwhile"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            previous = self._entries.pop(key, None)
+            if previous:
+                self.size_bytes -= len(previous[2])
+            self._entries[key] = (generation, time.monotonic(), body)
+            self.size_bytes += len(body)
+            while self.size_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+                self.evictions += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "generation": self.generation,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions
+        }
+
+list_cache = ListResultCache(
+    max_bytes=int(os.getenv('LIST_CACHE_MAX_BYTES', str(8 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv('LIST_CACHE_TTL_SECONDS', '5'))
+)
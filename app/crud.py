@@ -1,5 +1,6 @@
-from database.connection import get_db_connection, DatabaseErrorException
+from database.connection import get_db_connection, DatabaseConnection, DatabaseErrorException, is_connection_lost
 from schemas.task import TaskCreate, TaskUpdate
+from app.cache import list_cache
 from typing import List, Optional, Dict, Any
 from decimal import Decimal, InvalidOperation
 import mysql.connector
@@ -9,19 +10,60 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Columnas comunes a tasks y tasks_archive
+TASK_COLUMNS = "id, name, description, price, created_at, updated_at"
+
 class TaskCRUD:
+    # Consultas ejecutadas en el arranque para calentar caches del servidor
+    WARMUP_STATEMENTS = (
+        ("SELECT * FROM tasks ORDER BY created_at ASC LIMIT 1", None),
+        ("SELECT * FROM tasks WHERE id = %s", (0,)),
+    )
     
     @staticmethod
-    def get_all_tasks() -> List[Dict[str, Any]]:
-        """Get all tasks"""
-        connection = None
-        cursor = None
-        try:
-            connection = get_db_connection()
+    def _execute_read(query: str, params: Optional[tuple] = None, fetch_one: bool = False):
+        """Run a read-only query, retrying it once on a fresh connection if the connection was dead.
+
+        Only reads go through here: a write that failed mid-flight may or may not have been applied.
+        """
+        connection = get_db_connection()
+        for attempt in (1, 2):
             cursor = connection.cursor(dictionary=True)
-            query = "SELECT * FROM tasks ORDER BY created_at ASC"
-            cursor.execute(query)
-            tasks = cursor.fetchall()
+            try:
+                cursor.execute(query, params)
+                return cursor.fetchone() if fetch_one else cursor.fetchall()
+            except Error as e:
+                if attempt == 2 or not is_connection_lost(e):
+                    raise
+                logger.warning(f"Connection lost during query, retrying on a fresh connection: {e}")
+                connection = DatabaseConnection().reconnect()
+            finally:
+                cursor.close()
+    
+    @staticmethod
+    def _rollback(connection) -> None:
+        """Roll back inside an error handler without letting a dead connection hide the original error"""
+        if not connection:
+            return
+        try:
+            connection.rollback()
+        except Error as e:
+            logger.warning(f"Rollback failed: {e}")
+    
+    @staticmethod
+    def get_all_tasks(include_archived: bool = False) -> List[Dict[str, Any]]:
+        """Get all tasks, optionally including the ones moved to tasks_archive"""
+        try:
+            if include_archived:
+                query = f"""
+                SELECT {TASK_COLUMNS} FROM tasks
+                UNION ALL
+                SELECT {TASK_COLUMNS} FROM tasks_archive
+                ORDER BY created_at ASC
+                """
+            else:
+                query = "SELECT * FROM tasks ORDER BY created_at ASC"
+            tasks = TaskCRUD._execute_read(query)
             logger.info(f"Retrieved {len(tasks)} tasks successfully")
             return tasks
         except DatabaseErrorException as e:
@@ -40,23 +82,18 @@ class TaskCRUD:
                 status_code=500,
                 error_code="UNEXPECTED_FETCH_ERROR"
             )
-        finally:
-            if cursor:
-                cursor.close()
     
     @staticmethod
-    def get_task_by_id(task_id: int) -> Optional[Dict[str, Any]]:
-        """Get a task by ID"""
-        connection = None
-        cursor = None
+    def get_task_by_id(task_id: int, include_archived: bool = False) -> Optional[Dict[str, Any]]:
+        """Get a task by ID, falling back to tasks_archive when include_archived is set"""
         try:
             if not isinstance(task_id, int) or task_id <= 0:
                 raise ValueError("Invalid task ID")
-            connection = get_db_connection()
-            cursor = connection.cursor(dictionary=True)
-            query = "SELECT * FROM tasks WHERE id = %s"
-            cursor.execute(query, (task_id,))
-            task = cursor.fetchone()
+            task = TaskCRUD._execute_read("SELECT * FROM tasks WHERE id = %s", (task_id,), fetch_one=True)
+            if not task and include_archived:
+                task = TaskCRUD._execute_read(
+                    f"SELECT {TASK_COLUMNS} FROM tasks_archive WHERE id = %s", (task_id,), fetch_one=True
+                )
             if task:
                 logger.info(f"Retrieved task ID {task_id} successfully")
             else:
@@ -85,9 +122,6 @@ class TaskCRUD:
                 status_code=500,
                 error_code="UNEXPECTED_TASK_ERROR"
             )
-        finally:
-            if cursor:
-                cursor.close()
     
     @staticmethod
     def create_task(task: TaskCreate) -> Dict[str, Any]:
@@ -105,6 +139,7 @@ class TaskCRUD:
             price_value = float(task.price)
             cursor.execute(query, (task.name, task.description, price_value))
             connection.commit()
+            list_cache.bump_generation()
             task_id = cursor.lastrowid
             query = "SELECT * FROM tasks WHERE id = %s"
             cursor.execute(query, (task_id,))
@@ -127,8 +162,7 @@ class TaskCRUD:
                 error_code="INVALID_PRICE_FORMAT"
             )
         except IntegrityError as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Integrity error creating task: {e}")
             if "Duplicate entry" in str(e):
                 raise DatabaseErrorException(
@@ -143,8 +177,7 @@ class TaskCRUD:
                     error_code="INTEGRITY_ERROR"
                 )
         except DataError as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Data error creating task: {e}")
             raise DatabaseErrorException(
                 message="Invalid data provided. Please check field lengths and types.",
@@ -152,12 +185,10 @@ class TaskCRUD:
                 error_code="INVALID_DATA"
             )
         except DatabaseErrorException as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             raise e
         except Error as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Database error creating task: {e}")
             raise DatabaseErrorException(
                 message="Failed to create task in database",
@@ -165,8 +196,7 @@ class TaskCRUD:
                 error_code="CREATE_TASK_ERROR"
             )
         except Exception as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Unexpected error creating task: {e}")
             raise DatabaseErrorException(
                 message="An unexpected error occurred while creating task",
@@ -215,6 +245,7 @@ class TaskCRUD:
             values.append(task_id)
             cursor.execute(update_query, tuple(values))
             connection.commit()
+            list_cache.bump_generation()
             rows_affected = cursor.rowcount
             if rows_affected == 0:
                 logger.warning(f"No rows affected when updating task ID {task_id}")
@@ -222,8 +253,7 @@ class TaskCRUD:
             logger.info(f"Updated task ID {task_id} successfully")
             return updated_task
         except ValueError as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.warning(f"Invalid input for task update: {e}")
             raise DatabaseErrorException(
                 message=str(e),
@@ -231,8 +261,7 @@ class TaskCRUD:
                 error_code="INVALID_UPDATE_INPUT"
             )
         except IntegrityError as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Integrity error updating task {task_id}: {e}")
             raise DatabaseErrorException(
                 message="Database integrity constraint violated",
@@ -240,12 +269,10 @@ class TaskCRUD:
                 error_code="UPDATE_INTEGRITY_ERROR"
             )
         except DatabaseErrorException as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             raise e
         except Error as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Database error updating task {task_id}: {e}")
             raise DatabaseErrorException(
                 message=f"Failed to update task with ID {task_id}",
@@ -253,8 +280,7 @@ class TaskCRUD:
                 error_code="UPDATE_TASK_ERROR"
             )
         except Exception as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Unexpected error updating task {task_id}: {e}")
             raise DatabaseErrorException(
                 message="An unexpected error occurred while updating task",
@@ -281,6 +307,7 @@ class TaskCRUD:
             query = "DELETE FROM tasks WHERE id = %s"
             cursor.execute(query, (task_id,))
             connection.commit()
+            list_cache.bump_generation()
             rows_affected = cursor.rowcount
             deleted = rows_affected > 0
             if deleted:
@@ -289,8 +316,7 @@ class TaskCRUD:
                 logger.warning(f"No task deleted for ID {task_id}")
             return deleted
         except ValueError as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.warning(f"Invalid input for task deletion: {e}")
             raise DatabaseErrorException(
                 message=str(e),
@@ -298,12 +324,10 @@ class TaskCRUD:
                 error_code="INVALID_DELETE_INPUT"
             )
         except DatabaseErrorException as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             raise e
         except Error as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Database error deleting task {task_id}: {e}")
             raise DatabaseErrorException(
                 message=f"Failed to delete task with ID {task_id}",
@@ -311,8 +335,7 @@ class TaskCRUD:
                 error_code="DELETE_TASK_ERROR"
             )
         except Exception as e:
-            if connection:
-                connection.rollback()
+            TaskCRUD._rollback(connection)
             logger.error(f"Unexpected error deleting task {task_id}: {e}")
             raise DatabaseErrorException(
                 message="An unexpected error occurred while deleting task",
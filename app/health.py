@@ -0,0 +1,89 @@
+from database.connection import DatabaseConnection
+from typing import Dict, Any, Optional
+from datetime import datetime
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class HealthProber:
+    """Checks the database in the background so health probes are answered from cached state"""
+    INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', '5'))  # seconds
+    FAILURE_THRESHOLD = int(os.getenv('HEALTH_FAILURE_THRESHOLD', '3'))
+
+    def __init__(self):
+        self.latency_ms: Optional[float] = None
+        self.consecutive_failures = 0
+        self.total_checks = 0
+        self.last_error: Optional[str] = None
+        self.last_checked_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._check_lock = asyncio.Lock()
+        # Las comprobaciones van de una en una, así que una conexión basta para el prober y deep=true
+        DatabaseConnection.reserve_connections("health", 1)
+
+    @property
+    def status(self) -> str:
+        if self.last_checked_at is None:
+            return "unknown"
+        if self.consecutive_failures == 0:
+            return "healthy"
+        if self.consecutive_failures < self.FAILURE_THRESHOLD:
+            return "degraded"
+        return "unhealthy"
+
+    async def check(self) -> None:
+        """Run one database check off the event loop and record the result"""
+        async with self._check_lock:
+            try:
+                self.latency_ms = await asyncio.to_thread(DatabaseConnection().check_health)
+                self.consecutive_failures = 0
+                self.last_error = None
+                self.last_success_at = datetime.now()
+            except Exception as e:
+                self.consecutive_failures += 1
+                self.last_error = str(e)
+                logger.warning(f"Database health probe failed ({self.consecutive_failures} in a row): {str(e)}")
+            self.total_checks += 1
+            self.last_checked_at = datetime.now()
+
+    async def _run(self) -> None:
+        breaker = DatabaseConnection().breaker
+        while True:
+            await self.check()
+            # Con el circuito abierto, el siguiente intento es la prueba half-open tras el backoff
+            delay = breaker.seconds_until_retry() if breaker.state == breaker.OPEN else self.INTERVAL
+            await asyncio.sleep(max(delay, 0.1))
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Database health prober started (interval {self.INTERVAL}s)")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        database = {"healthy": "connected", "degraded": "degraded", "unhealthy": "disconnected"}
+        result = {
+            "status": self.status,
+            "database": database.get(self.status, "unknown"),
+            "latency_ms": round(self.latency_ms, 3) if self.latency_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "timestamp": datetime.now().isoformat()
+        }
+        if self.last_error:
+            result["error"] = self.last_error
+        return result
+
+prober = HealthProber()
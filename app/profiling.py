@@ -0,0 +1,106 @@
+from fastapi import Request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+def debug_enabled() -> bool:
+    """Debug endpoints and request profiling are on in development or with DEBUG_ENDPOINTS=true"""
+    default = "true" if os.getenv("ENVIRONMENT") == "development" else "false"
+    return os.getenv("DEBUG_ENDPOINTS", default).lower() == "true"
+
+class RequestProfile:
+    """cProfile data for the worker-thread part of one sampled request.
+
+    The event loop is shared by every in-flight request, so it is not profiled: its
+    stats would mix in other requests' coroutines.
+    """
+    def __init__(self, request: Request):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = request.method
+        self.path = request.url.path
+        self.started_at = datetime.now()
+        self.duration_ms: Optional[float] = None
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self.profiles.append(profiler)
+
+    def report(self, limit: int = 40) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(*self.profiles, stream=output)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms
+        }
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+class RequestProfiler:
+    """Profiles a sample of the requests that ask for it with the X-Profile header"""
+    def __init__(self, sample_rate: float, keep: int):
+        self.sample_rate = sample_rate
+        self.recent = deque(maxlen=keep)
+
+    def start(self, request: Request) -> Optional[RequestProfile]:
+        if not request.headers.get(PROFILE_HEADER) or not debug_enabled():
+            return None
+        if random.random() >= self.sample_rate:
+            return None
+        return RequestProfile(request)
+
+    def finish(self, profile: RequestProfile, duration_ms: float) -> None:
+        profile.duration_ms = round(duration_ms, 3)
+        self.recent.append(profile)
+        logger.info(f"Profiled {profile.method} {profile.path} as {profile.id} ({profile.duration_ms} ms)")
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self.recent:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+@contextmanager
+def profile_worker_thread():
+    """Profile the worker-thread part of a sampled request; no-op otherwise"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.profile():
+        yield
+
+request_profiler = RequestProfiler(
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0.05')),
+    keep=int(os.getenv('PROFILE_KEEP', '20'))
+)
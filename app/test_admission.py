@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionLane
+from database.connection import DatabaseErrorException
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_admits_up_to_max_inflight():
+    async def scenario():
+        lane = AdmissionLane("test", max_inflight=2, max_queue=0, latency_budget_ms=100)
+        await lane.acquire()
+        await lane.acquire()
+        assert lane.inflight == 2
+        with pytest.raises(DatabaseErrorException) as excinfo:
+            await lane.acquire()
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.error_code == "SERVER_OVERLOADED"
+        assert excinfo.value.retry_after == 1
+        assert (lane.admitted, lane.shed) == (2, 1)
+    run(scenario())
+
+
+def test_sheds_when_wait_queue_is_full():
+    async def scenario():
+        lane = AdmissionLane("test", max_inflight=1, max_queue=1, latency_budget_ms=1000)
+        await lane.acquire()
+        waiter = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        assert lane.waiting == 1
+        with pytest.raises(DatabaseErrorException):
+            await lane.acquire()
+        lane.release(0.01)
+        await waiter
+        assert lane.inflight == 1
+        assert (lane.admitted, lane.shed) == (2, 1)
+    run(scenario())
+
+
+def test_sheds_when_estimated_wait_exceeds_budget():
+    async def scenario():
+        lane = AdmissionLane("test", max_inflight=1, max_queue=10, latency_budget_ms=500)
+        await lane.acquire()
+        lane.avg_service_time = 1.0
+        with pytest.raises(DatabaseErrorException):
+            await lane.acquire()
+        # No llegó a esperar en la cola
+        assert lane.waiting == 0
+    run(scenario())
+
+
+def test_sheds_after_waiting_longer_than_budget():
+    async def scenario():
+        lane = AdmissionLane("test", max_inflight=1, max_queue=10, latency_budget_ms=20)
+        await lane.acquire()
+        with pytest.raises(DatabaseErrorException):
+            await lane.acquire()
+        assert lane.waiting == 0
+        assert lane.inflight == 1
+        lane.release(0.01)
+        await lane.acquire()
+        assert lane.admitted == 2
+    run(scenario())
+
+
+def test_release_updates_average_service_time():
+    async def scenario():
+        lane = AdmissionLane("test", max_inflight=1, max_queue=0, latency_budget_ms=100)
+        await lane.acquire()
+        lane.release(0.1)
+        assert lane.avg_service_time == pytest.approx(0.1)
+        await lane.acquire()
+        lane.release(0.2)
+        assert lane.avg_service_time == pytest.approx(0.12)
+        assert lane.inflight == 0
+    run(scenario())
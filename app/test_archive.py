@@ -0,0 +1,241 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import DatabaseError, ProgrammingError, errorcode
+import pytest
+
+from app import archive
+from app.archive import ReplicaLagUnavailable, TaskArchiver
+
+CUTOFF = datetime(2024, 1, 1)
+
+
+class FakeCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, query, params=None):
+        connection = self.connection
+        if connection.fail_on and query.startswith(connection.fail_on):
+            raise DatabaseError(msg="Lock wait timeout exceeded", errno=errorcode.ER_LOCK_WAIT_TIMEOUT)
+        if query.startswith("SELECT id, created_at FROM tasks"):
+            cutoff, created_at, task_id, limit = params
+            connection.keys_after.append((created_at, task_id))
+            keys = sorted((c, i) for i, c in connection.tasks.items() if c < cutoff and (c, i) > (created_at, task_id))
+            self._rows = [(i, c) for c, i in keys[:limit]]
+        elif query.startswith("INSERT INTO tasks_archive"):
+            for task_id in params:
+                connection.archive[task_id] = connection.tasks[task_id]
+        elif query.startswith("DELETE FROM tasks"):
+            self.rowcount = len(params)
+            for task_id in params:
+                del connection.tasks[task_id]
+        elif query == "SHOW REPLICA STATUS":
+            self._rows = connection.replica_status
+        else:
+            raise AssertionError(f"Unexpected statement: {query}")
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """In-memory tasks and tasks_archive tables; changes only survive commit()"""
+    def __init__(self, tasks=None, replica_status=None):
+        self.tasks = dict(tasks or {})
+        self.archive = {}
+        self.replica_status = replica_status or []
+        self.fail_on = None
+        self.keys_after = []
+        self.commits = 0
+        self.rollbacks = 0
+        self._committed = (dict(self.tasks), {})
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self, **kwargs)
+
+    def commit(self):
+        self.commits += 1
+        self._committed = (dict(self.tasks), dict(self.archive))
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.tasks, self.archive = dict(self._committed[0]), dict(self._committed[1])
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @contextmanager
+    def checkout(self):
+        yield self.connection
+
+    def close_connection(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(archive.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def database(monkeypatch, tasks):
+    connection = FakeConnection(tasks)
+    monkeypatch.setattr(archive, "DatabaseConnection", lambda: FakeDatabase(connection))
+    monkeypatch.delenv("ARCHIVE_REPLICA_HOST", raising=False)
+    return connection
+
+
+def old_tasks(count, start=datetime(2023, 1, 1)):
+    return {task_id: start + timedelta(days=task_id // 2) for task_id in range(1, count + 1)}
+
+
+def lag_readings(archiver, *readings):
+    """Make _replica_lag return (or raise) each reading in turn"""
+    remaining = list(readings)
+    def replica_lag():
+        reading = remaining.pop(0)
+        if isinstance(reading, Exception):
+            raise reading
+        return reading
+    archiver._replica_lag = replica_lag
+
+
+def test_batches_walk_in_created_at_id_order(monkeypatch, sleeps):
+    # Los ids no siguen el orden de created_at y hay created_at repetidos
+    tasks = {5: datetime(2023, 1, 1), 2: datetime(2023, 1, 1), 9: datetime(2023, 1, 2),
+             1: datetime(2023, 1, 3), 7: datetime(2023, 1, 3), 3: datetime(2024, 6, 1)}
+    connection = database(monkeypatch, tasks)
+    report = TaskArchiver(batch_size=2, pause_seconds=0).run(CUTOFF)
+    assert connection.keys_after == [
+        (datetime.min, 0),
+        (datetime(2023, 1, 1), 5),
+        (datetime(2023, 1, 3), 1),
+        (datetime(2023, 1, 3), 7),
+    ]
+    assert sorted(connection.archive) == [1, 2, 5, 7, 9]
+    assert list(connection.tasks) == [3]
+    assert (report["batches"], report["rows_moved"]) == (3, 5)
+
+
+def test_each_batch_commits_once_and_the_run_stops_on_an_empty_batch(monkeypatch, sleeps):
+    connection = database(monkeypatch, old_tasks(7))
+    report = TaskArchiver(batch_size=3, pause_seconds=0).run(CUTOFF)
+    assert report["batches"] == 3
+    assert connection.commits == 3
+    # El último SELECT no devuelve filas y solo deshace su snapshot
+    assert connection.rollbacks == 1
+    assert len(connection.keys_after) == 4
+    assert connection.tasks == {}
+
+
+def test_failed_batch_rolls_back(monkeypatch, sleeps):
+    connection = database(monkeypatch, old_tasks(4))
+    connection.fail_on = "DELETE"
+    with pytest.raises(DatabaseError):
+        TaskArchiver(batch_size=2, pause_seconds=0).run(CUTOFF)
+    assert (connection.commits, connection.rollbacks) == (0, 1)
+    assert connection.archive == {}
+    assert len(connection.tasks) == 4
+
+
+def test_max_batches_is_respected(monkeypatch, sleeps):
+    connection = database(monkeypatch, old_tasks(10))
+    report = TaskArchiver(batch_size=2, pause_seconds=0).run(CUTOFF, max_batches=2)
+    assert (report["batches"], report["rows_moved"]) == (2, 4)
+    assert len(connection.tasks) == 6
+
+
+def test_throttles_while_replica_lag_is_above_the_limit(monkeypatch, sleeps):
+    database(monkeypatch, old_tasks(2))
+    archiver = TaskArchiver(batch_size=2, pause_seconds=0, max_replica_lag=5)
+    lag_readings(archiver, 12.0, 8.0, 3.0)
+    report = archiver.run(CUTOFF)
+    assert report["throttled_seconds"] == 2
+    assert report["max_replica_lag"] == 12.0
+    assert sleeps.count(1) == 2
+
+
+def test_unreadable_lag_pauses_archival(monkeypatch, sleeps):
+    database(monkeypatch, old_tasks(2))
+    archiver = TaskArchiver(batch_size=2, pause_seconds=0)
+    lag_readings(archiver, ReplicaLagUnavailable("replication is stopped"), 1.0)
+    report = archiver.run(CUTOFF)
+    assert report["throttled_seconds"] == 1
+    assert report["replica_lag_error"] is None
+    assert report["aborted"] is None
+
+
+def test_lag_unreadable_for_too_long_aborts(monkeypatch, sleeps):
+    connection = database(monkeypatch, old_tasks(6))
+    archiver = TaskArchiver(batch_size=2, pause_seconds=0, max_replica_unavailable=0)
+    lag_readings(archiver, ReplicaLagUnavailable("replication is stopped"))
+    report = archiver.run(CUTOFF)
+    assert report["batches"] == 1
+    assert report["replica_lag_error"] == "replication is stopped"
+    assert "replication is stopped" in report["aborted"]
+    assert len(connection.tasks) == 4
+
+
+def test_replica_lag_reads_seconds_behind_source(monkeypatch):
+    monkeypatch.setenv("ARCHIVE_REPLICA_HOST", "replica")
+    replica = FakeConnection(replica_status=[{"Seconds_Behind_Source": 3}])
+    monkeypatch.setattr(mysql.connector, "connect", lambda **config: replica)
+    assert TaskArchiver()._replica_lag() == 3.0
+
+
+def test_stopped_replication_is_unavailable_not_zero_lag(monkeypatch):
+    monkeypatch.setenv("ARCHIVE_REPLICA_HOST", "replica")
+    replica = FakeConnection(replica_status=[{"Seconds_Behind_Source": None}])
+    monkeypatch.setattr(mysql.connector, "connect", lambda **config: replica)
+    with pytest.raises(ReplicaLagUnavailable, match="replication is stopped"):
+        TaskArchiver()._replica_lag()
+
+
+def test_missing_privilege_is_unavailable(monkeypatch):
+    monkeypatch.setenv("ARCHIVE_REPLICA_HOST", "replica")
+    def connect(**config):
+        raise ProgrammingError(msg="Access denied; you need the REPLICATION CLIENT privilege",
+                               errno=errorcode.ER_SPECIFIC_ACCESS_DENIED_ERROR)
+    monkeypatch.setattr(mysql.connector, "connect", connect)
+    with pytest.raises(ReplicaLagUnavailable, match="REPLICATION CLIENT"):
+        TaskArchiver()._replica_lag()
+
+
+def test_without_a_replica_lag_is_not_measured(monkeypatch):
+    monkeypatch.delenv("ARCHIVE_REPLICA_HOST", raising=False)
+    assert TaskArchiver()._replica_lag() is None
+
+
+def test_cli_reports_unavailable_lag_and_exits_on_abort(monkeypatch, sleeps, capsys):
+    database(monkeypatch, old_tasks(4))
+    monkeypatch.setenv("ARCHIVE_REPLICA_HOST", "replica")
+    def replica_lag(self):
+        raise ReplicaLagUnavailable("replication is stopped")
+    monkeypatch.setattr(TaskArchiver, "_replica_lag", replica_lag)
+    monkeypatch.setattr("sys.argv", ["archive", "--older-than-days", "1", "--batch-size", "2", "--max-replica-unavailable", "0"])
+    with pytest.raises(SystemExit) as excinfo:
+        archive.main()
+    assert excinfo.value.code == 1
+    output = capsys.readouterr().out
+    assert "Max replica lag: unavailable: replication is stopped" in output
+    assert "not set" not in output
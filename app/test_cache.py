@@ -0,0 +1,72 @@
+from app.cache import ListResultCache
+
+
+def test_key_ignores_parameter_order():
+    assert ListResultCache.key_for({"a": 1, "b": True}) == ListResultCache.key_for({"b": True, "a": 1})
+
+
+def test_hit_after_put():
+    cache = ListResultCache(max_bytes=1024, ttl_seconds=60)
+    key = cache.key_for({"include_archived": False})
+    assert cache.get(key) is None
+    cache.put(key, cache.generation, b"[]")
+    assert cache.get(key) == b"[]"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_bump_generation_invalidates_every_entry():
+    cache = ListResultCache(max_bytes=1024, ttl_seconds=60)
+    for archived in (False, True):
+        cache.put(cache.key_for({"include_archived": archived}), cache.generation, b"[]")
+    cache.bump_generation()
+    assert cache.get(cache.key_for({"include_archived": False})) is None
+    assert cache.get(cache.key_for({"include_archived": True})) is None
+    assert cache.size_bytes == 0
+
+
+def test_put_from_before_a_write_is_dropped():
+    cache = ListResultCache(max_bytes=1024, ttl_seconds=60)
+    key = cache.key_for({})
+    # La lectura empezó antes de la escritura y termina después
+    generation = cache.generation
+    cache.bump_generation()
+    cache.put(key, generation, b"[stale]")
+    assert cache.get(key) is None
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_entries_expire_after_ttl():
+    cache = ListResultCache(max_bytes=1024, ttl_seconds=0)
+    key = cache.key_for({})
+    cache.put(key, cache.generation, b"[]")
+    assert cache.get(key) is None
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = ListResultCache(max_bytes=10, ttl_seconds=60)
+    first, second, third = (cache.key_for({"page": n}) for n in range(3))
+    cache.put(first, cache.generation, b"aaaa")
+    cache.put(second, cache.generation, b"bbbb")
+    assert cache.get(first) == b"aaaa"
+    cache.put(third, cache.generation, b"cccc")
+    assert cache.get(second) is None
+    assert cache.get(first) == b"aaaa"
+    assert cache.get(third) == b"cccc"
+    assert (cache.size_bytes, cache.evictions) == (8, 1)
+
+
+def test_body_larger_than_cache_is_not_stored():
+    cache = ListResultCache(max_bytes=4, ttl_seconds=60)
+    key = cache.key_for({})
+    cache.put(key, cache.generation, b"too large")
+    assert cache.get(key) is None
+    assert cache.size_bytes == 0
+
+
+def test_replacing_an_entry_keeps_size_accurate():
+    cache = ListResultCache(max_bytes=100, ttl_seconds=60)
+    key = cache.key_for({})
+    cache.put(key, cache.generation, b"aaaa")
+    cache.put(key, cache.generation, b"bb")
+    assert cache.size_bytes == 2
+    assert cache.snapshot()["entries"] == 1
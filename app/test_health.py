@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+from app import api
+from app.health import HealthProber
+from app.startup import ReadinessState
+from database.connection import DatabaseConnection, DatabaseErrorException
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def unavailable():
+    return DatabaseErrorException("Database service unavailable. Please try again later.", 503, "DB_CONNECTION_FAILED")
+
+
+def fake_check_health(monkeypatch, *results):
+    """Make DatabaseConnection.check_health return (or raise) each result in turn"""
+    remaining = list(results)
+    def check_health(self):
+        result = remaining.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    monkeypatch.setattr(DatabaseConnection, "check_health", check_health)
+
+
+def test_status_follows_consecutive_failures(monkeypatch):
+    monkeypatch.setattr(HealthProber, "FAILURE_THRESHOLD", 3)
+    fake_check_health(monkeypatch, 1.5, unavailable(), unavailable(), unavailable(), 2.0)
+    prober = HealthProber()
+    assert prober.status == "unknown"
+    async def scenario():
+        statuses = []
+        for _ in range(5):
+            await prober.check()
+            statuses.append(prober.status)
+        return statuses
+    assert run(scenario()) == ["healthy", "degraded", "degraded", "unhealthy", "healthy"]
+    assert prober.total_checks == 5
+    assert prober.latency_ms == 2.0
+    assert prober.snapshot()["database"] == "connected"
+    assert "error" not in prober.snapshot()
+
+
+def test_failure_is_reported_in_the_snapshot(monkeypatch):
+    monkeypatch.setattr(HealthProber, "FAILURE_THRESHOLD", 1)
+    fake_check_health(monkeypatch, unavailable())
+    prober = HealthProber()
+    run(prober.check())
+    snapshot = prober.snapshot()
+    assert (snapshot["status"], snapshot["database"]) == ("unhealthy", "disconnected")
+    assert snapshot["error"] == "Database service unavailable. Please try again later."
+    assert snapshot["last_success_at"] is None
+
+
+def test_deep_check_shares_the_lock_with_the_background_check(monkeypatch):
+    prober = HealthProber()
+    monkeypatch.setattr(api, "prober", prober)
+    release = threading.Event()
+    lock = threading.Lock()
+    running = []
+    overlapped = []
+    def check_health(self):
+        with lock:
+            running.append(1)
+            overlapped.append(len(running) > 1)
+        release.wait(5)
+        with lock:
+            running.pop()
+        return 1.0
+    monkeypatch.setattr(DatabaseConnection, "check_health", check_health)
+    async def scenario():
+        background = asyncio.create_task(prober.check())
+        await asyncio.sleep(0.05)
+        deep = asyncio.create_task(api.health_check(deep=True))
+        await asyncio.sleep(0.05)
+        # La comprobación deep espera al lock y no ocupa otra conexión
+        assert prober._check_lock.locked()
+        assert len(overlapped) == 1
+        release.set()
+        await background
+        return await deep
+    snapshot = run(scenario())
+    assert overlapped == [False, False]
+    assert prober.total_checks == 2
+    assert snapshot["status"] == "healthy"
+
+
+def test_ready_is_503_once_the_prober_is_unhealthy(monkeypatch):
+    monkeypatch.setattr(HealthProber, "FAILURE_THRESHOLD", 2)
+    fake_check_health(monkeypatch, 1.0, unavailable(), unavailable(), 1.0)
+    prober = HealthProber()
+    readiness = ReadinessState()
+    readiness.ready = True
+    monkeypatch.setattr(api, "prober", prober)
+    monkeypatch.setattr(api, "readiness", readiness)
+    async def scenario():
+        codes = []
+        for _ in range(4):
+            await prober.check()
+            response = await api.readiness_check()
+            codes.append(getattr(response, "status_code", 200))
+        return codes
+    assert run(scenario()) == [200, 200, 503, 200]
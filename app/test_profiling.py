@@ -0,0 +1,83 @@
+import asyncio
+
+from fastapi import Request
+import pytest
+
+from app import profiling
+from app.profiling import RequestProfiler, current_profile, profile_worker_thread
+
+
+def request(headers=None):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/items", "headers": raw, "query_string": b""})
+
+
+@pytest.fixture(autouse=True)
+def debug(monkeypatch):
+    monkeypatch.setenv("DEBUG_ENDPOINTS", "true")
+
+
+def test_only_requests_with_the_header_are_profiled():
+    profiler = RequestProfiler(sample_rate=1.0, keep=5)
+    assert profiler.start(request()) is None
+    assert profiler.start(request({"X-Profile": "1"})) is not None
+
+
+def test_nothing_is_profiled_with_debug_disabled(monkeypatch):
+    monkeypatch.setenv("DEBUG_ENDPOINTS", "false")
+    profiler = RequestProfiler(sample_rate=1.0, keep=5)
+    assert profiler.start(request({"X-Profile": "1"})) is None
+
+
+def test_requests_are_sampled_with_sample_rate(monkeypatch):
+    profiler = RequestProfiler(sample_rate=0.25, keep=5)
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.25)
+    assert profiler.start(request({"X-Profile": "1"})) is None
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.2)
+    assert profiler.start(request({"X-Profile": "1"})) is not None
+
+
+def test_concurrent_requests_can_be_profiled():
+    profiler = RequestProfiler(sample_rate=1.0, keep=5)
+    first = profiler.start(request({"X-Profile": "1"}))
+    second = profiler.start(request({"X-Profile": "1"}))
+    assert first is not None and second is not None
+    assert first.id != second.id
+
+
+def test_keeps_the_most_recent_profiles():
+    profiler = RequestProfiler(sample_rate=1.0, keep=2)
+    profiles = [profiler.start(request({"X-Profile": "1"})) for _ in range(3)]
+    for profile in profiles:
+        profiler.finish(profile, 1.23456)
+    assert list(profiler.recent) == profiles[1:]
+    assert profiler.get(profiles[0].id) is None
+    assert profiler.get(profiles[2].id) is profiles[2]
+    assert profiles[2].summary()["duration_ms"] == 1.235
+
+
+def test_only_the_worker_thread_is_profiled():
+    profile = RequestProfiler(sample_rate=1.0, keep=5).start(request({"X-Profile": "1"}))
+
+    def worker():
+        with profile_worker_thread():
+            return sum(range(10))
+
+    async def scenario():
+        token = current_profile.set(profile)
+        try:
+            return await asyncio.to_thread(worker)
+        finally:
+            current_profile.reset(token)
+
+    assert asyncio.run(scenario()) == 45
+    assert len(profile.profiles) == 1
+    report = profile.report()
+    assert "builtins.sum" in report
+    assert "scenario" not in report
+
+
+def test_worker_thread_outside_a_sampled_request_is_not_profiled():
+    with profile_worker_thread():
+        pass
+    assert current_profile.get() is None
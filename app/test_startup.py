@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+import pytest
+
+from app import startup
+from database.connection import DatabaseConnection, DatabaseErrorException
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    readiness = startup.ReadinessState()
+    monkeypatch.setattr(startup, "readiness", readiness)
+    monkeypatch.setattr(DatabaseConnection, "MAX_RETRY_DELAY", 0.01)
+    return readiness
+
+
+def fake_warm_up(monkeypatch, *errors):
+    """Make DatabaseConnection.warm_up raise each error in turn, then succeed"""
+    remaining = list(errors)
+    def warm_up(self, statements=(), timeout=None):
+        if remaining:
+            raise remaining.pop(0)
+    monkeypatch.setattr(DatabaseConnection, "warm_up", warm_up)
+
+
+def unavailable():
+    return DatabaseErrorException("Database service unavailable. Please try again later.", 503, "DB_CONNECTION_FAILED")
+
+
+def test_warm_up_starts_over_while_the_database_is_unreachable(readiness, monkeypatch):
+    fake_warm_up(monkeypatch, unavailable(), unavailable())
+    startup.warm_up(FastAPI())
+    assert readiness.ready
+    assert readiness.attempts == 3
+    assert readiness.error is None
+    assert readiness.last_error is None
+
+
+def test_non_transient_failure_is_final(readiness, monkeypatch):
+    fake_warm_up(monkeypatch, DatabaseErrorException("Database authentication failed", 401, "DB_AUTH_FAILED"))
+    startup.warm_up(FastAPI())
+    assert not readiness.ready
+    assert readiness.attempts == 1
+    assert readiness.error == "Database authentication failed"
+
+
+def test_stop_ends_the_retry_loop(readiness, monkeypatch):
+    def warm_up(self, statements=(), timeout=None):
+        startup.stop_warm_up()
+        raise unavailable()
+    monkeypatch.setattr(DatabaseConnection, "warm_up", warm_up)
+    startup.warm_up(FastAPI())
+    assert not readiness.ready
+    assert readiness.error is None
+    assert readiness.last_error is not None
@@ -0,0 +1,110 @@
+"""Per-query overhead of connection validation, before and after the idle-threshold policy.
+
+The last row is the path requests take: get_connection() inside a pooled checkout(),
+including the ROLLBACK that releasing a connection after a read costs with autocommit off.
+Uses a simulated connection whose round trips cost --rtt-ms, so it runs without MySQL:
+
+    python -m benchmarks.bench_connection_validation --rtt-ms 0.5 --queries 2000
+"""
+from contextlib import nullcontext
+import argparse
+import time
+
+import mysql.connector
+
+from database.connection import DatabaseConnection
+
+
+class SimulatedCursor:
+    rowcount = 0
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        self.connection.round_trip()
+        # autocommit está desactivado: una lectura deja abierta una transacción
+        self.connection.in_transaction = True
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class SimulatedConnection:
+    """Stand-in for a MySQL connection that only counts and sleeps for round trips"""
+    rtt = 0.0
+    round_trips = 0
+
+    def __init__(self, **config):
+        self.in_transaction = False
+
+    def round_trip(self):
+        SimulatedConnection.round_trips += 1
+        time.sleep(self.rtt)
+
+    def is_connected(self):
+        self.round_trip()
+        return True
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self.round_trip()
+
+    def cursor(self, **kwargs):
+        return SimulatedCursor(self)
+
+    def rollback(self):
+        self.round_trip()
+        self.in_transaction = False
+
+    def close(self):
+        pass
+
+
+def legacy_get_connection(db):
+    """Validation as done before: is_connected() plus ping() on every checkout"""
+    if db.connection.is_connected():
+        db.connection.ping(reconnect=True, attempts=1, delay=0)
+    return db.connection
+
+
+def run(get_connection, queries: int, unit_of_work=nullcontext):
+    SimulatedConnection.round_trips = 0
+    start = time.perf_counter()
+    for _ in range(queries):
+        with unit_of_work():
+            cursor = get_connection().cursor(dictionary=True)
+            cursor.execute("SELECT * FROM tasks WHERE id = %s", (1,))
+            cursor.fetchall()
+            cursor.close()
+    elapsed = time.perf_counter() - start
+    return elapsed / queries * 1000, SimulatedConnection.round_trips / queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="simulated network round trip in ms")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    SimulatedConnection.rtt = args.rtt_ms / 1000
+    mysql.connector.connect = SimulatedConnection
+    # Una conexión del pool para el checkout, como la que reservan las lanes de admisión
+    DatabaseConnection.reserve_connections("benchmark", 1)
+    db = DatabaseConnection()
+    db.get_connection()
+
+    before_ms, before_trips = run(lambda: legacy_get_connection(db), args.queries)
+    after_ms, after_trips = run(db.get_connection, args.queries)
+    checkout_ms, checkout_trips = run(db.get_connection, args.queries, db.checkout)
+    print(f"{'policy':<34}{'ms/query':>10}{'round trips/query':>20}")
+    print(f"{'ping on every checkout':<34}{before_ms:>10.3f}{before_trips:>20.2f}")
+    print(f"{'validate after idle':<34}{after_ms:>10.3f}{after_trips:>20.2f}")
+    print(f"{'validate after idle, via checkout':<34}{checkout_ms:>10.3f}{checkout_trips:>20.2f}")
+    print(f"overhead removed per query: {before_ms - after_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import mysql.connector
-from mysql.connector import Error, DatabaseError, InterfaceError, PoolError
+from mysql.connector import Error, DatabaseError, InterfaceError, PoolError, errorcode
+from database.profiling import ProfiledConnection, query_profiler
 import os
+import random
+import threading
 import time
-from typing import Optional
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Callable
 import logging
 
 # Configurar logging
@@ -11,79 +15,635 @@ logger = logging.getLogger(__name__)
 
 class DatabaseErrorException(Exception):
     """Exception for errors in dtabase"""
-    def __init__(self, message: str, status_code: int = 500, error_code: str = None):
+    def __init__(self, message: str, status_code: int = 500, error_code: str = None, retry_after: Optional[int] = None):
         self.message = message
         self.status_code = status_code
         self.error_code = error_code
+        self.retry_after = retry_after
         super().__init__(self.message)
 
+# Errores de cliente que indican que el servidor no es alcanzable o cortó la conexión
+TRANSIENT_ERRNOS = {
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+}
+
+# Errores que indican que una conexión ya abierta murió
+CONNECTION_LOST_ERRNOS = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+}
+
+def is_transient_error(e: Error) -> bool:
+    """Whether a MySQL error means the server is unreachable rather than the request being wrong"""
+    return isinstance(e, InterfaceError) or getattr(e, "errno", None) in TRANSIENT_ERRNOS
+
+def is_connection_lost(e: Error) -> bool:
+    """Whether a query failed because its connection was dead"""
+    return getattr(e, "errno", None) in CONNECTION_LOST_ERRNOS
+
+class CircuitBreaker:
+    """Fails database calls fast while MySQL is down.
+
+    closed: calls go through and failures are counted.
+    open: calls are rejected with a 503 until the reset timeout, which grows with
+    jittered exponential backoff every time the circuit reopens.
+    half_open: a single trial call is let through; success closes the circuit, failure reopens it.
+
+    Only real round trips to MySQL (connects, pings and queries) are recorded, never
+    handing out a pooled connection, which usually does not touch the network.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 5, max_reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_opens = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self.opened_at: Optional[float] = None
+        self.current_timeout = reset_timeout
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def seconds_until_retry(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.current_timeout - time.monotonic())
+
+    def before_call(self) -> bool:
+        """Raise a 503 DatabaseErrorException if the call must not reach the database.
+
+        Returns True when the caller got the half-open trial and must make a real round trip.
+        """
+        if self.state == self.CLOSED:
+            return False
+        with self._lock:
+            if self.state == self.OPEN and self.seconds_until_retry() == 0:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+                logger.info("Circuit breaker half-open, letting a trial call through")
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            if self.state == self.CLOSED:
+                return False
+            self.rejected_calls += 1
+            retry_after = max(1, int(self.seconds_until_retry() + 0.999))
+        raise DatabaseErrorException(
+            message="Database service unavailable. Please try again later.",
+            status_code=503,
+            error_code="DB_CIRCUIT_OPEN",
+            retry_after=retry_after
+        )
+
+    def record_success(self) -> None:
+        if self.state == self.CLOSED and self.consecutive_failures == 0:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker closed, database reachable again")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.consecutive_opens = 0
+            self.current_timeout = self.reset_timeout
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give the half-open trial back when the call ended without reaching the database"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, trial: bool = False) -> None:
+        """Count a failed round trip.
+
+        Only failures while closed, and the half-open trial's own failure, count: calls that were
+        already running when the circuit opened must not reopen it and double the backoff again.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.failure_threshold:
+                    self._open()
+            elif self.state == self.HALF_OPEN and trial:
+                self.consecutive_failures += 1
+                self._open()
+
+    def _open(self) -> None:
+        backoff = min(self.max_reset_timeout, self.reset_timeout * 2 ** self.consecutive_opens)
+        # Jitter para que varias instancias no reintenten a la vez
+        self.current_timeout = backoff / 2 + random.uniform(0, backoff / 2)
+        self.consecutive_opens += 1
+        self.times_opened += 1
+        self.opened_at = time.monotonic()
+        self.state = self.OPEN
+        self._trial_in_flight = False
+        logger.warning(f"Circuit breaker open for {self.current_timeout:.1f} seconds after {self.consecutive_failures} failures")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls,
+            "retry_after_seconds": round(self.seconds_until_retry(), 3)
+        }
+
+
+class ConnectionPool:
+    """Pool of MySQL connections opened ahead of time.
+
+    Idle connections are only pinged on checkout when they have been idle longer than
+    validate_idle_seconds; a connection that dies sooner is caught by the failed query,
+    after which every connection released before that failure is pinged on its next checkout.
+    When every connection is in use, acquire() waits up to timeout seconds for one to be released.
+    """
+    def __init__(self, size: int, validate_idle_seconds: float = 30, timeout: float = 1, **config):
+        self.size = size
+        self.validate_idle_seconds = validate_idle_seconds
+        self.timeout = timeout
+        self._config = config
+        self._idle: List[Tuple[Any, float]] = []
+        self._available = threading.Condition()
+        self._opened = 0
+        self._stale_before = 0.0
+
+    def _reserve(self) -> Optional[Tuple[Any, float]]:
+        """Wait for an idle connection, returned with its release time, or for a free slot, returning None"""
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            while True:
+                if self._idle:
+                    # LIFO: la conexión más reciente es la que menos probablemente haya caducado
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError("Connection pool exhausted")
+                self._available.wait(remaining)
+
+    def _connect(self):
+        """Open a connection in a slot that is already reserved"""
+        try:
+            return ProfiledConnection(mysql.connector.connect(**self._config), query_profiler)
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _free_slot(self) -> None:
+        with self._available:
+            self._opened -= 1
+            self._available.notify()
+
+    def fill(self, prepare: Optional[Callable] = None) -> int:
+        """Open connections until the pool reaches its size, running prepare on each before it becomes available.
+
+        Requests may open connections concurrently; filling stops quietly once they have taken the last slot.
+        """
+        opened = 0
+        while True:
+            with self._available:
+                if self._opened >= self.size:
+                    return opened
+                self._opened += 1
+            connection = self._connect()
+            try:
+                if prepare:
+                    prepare(connection)
+            except Exception:
+                self.discard(connection)
+                raise
+            self.release(connection)
+            opened += 1
+
+    def acquire(self):
+        idle = self._reserve()
+        if idle is None:
+            return self._connect()
+        connection, released_at = idle
+        if released_at <= self._stale_before or time.monotonic() - released_at > self.validate_idle_seconds:
+            try:
+                connection.ping(reconnect=True, attempts=1, delay=0)
+            except Error as e:
+                logger.warning(f"Discarding dead pooled connection: {e}")
+                self._close(connection)
+                return self._connect()
+        return connection
+
+    def replace(self, connection):
+        """Close a dead connection and open a new one in its slot, never handing out an idle one"""
+        self._close(connection)
+        self.invalidate_idle()
+        return self._connect()
+
+    def release(self, connection) -> None:
+        with self._available:
+            self._idle.append((connection, time.monotonic()))
+            self._available.notify()
+
+    def invalidate_idle(self) -> None:
+        """Mark every idle connection as suspect after one was found dead, e.g. after a MySQL restart"""
+        self._stale_before = time.monotonic()
+
+    @staticmethod
+    def _close(connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def discard(self, connection) -> None:
+        """Close a broken connection and free its slot"""
+        self._close(connection)
+        self._free_slot()
+
+    def drain(self) -> List:
+        """Take every idle connection out of the pool"""
+        with self._available:
+            connections = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        return connections
+
+    def close_all(self) -> None:
+        for connection in self.drain():
+            self.discard(connection)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"size": self.size, "opened": self._opened, "idle": len(self._idle)}
+
+
 class DatabaseConnection:
     _instance = None
-    MAX_RETRIES = 3
     RETRY_DELAY = 2  # seconds
+    MAX_RETRY_DELAY = 10  # seconds
+    POOL_SIZE = os.getenv('DB_POOL_SIZE')  # sin fijar, la suma de las reservas
+    POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '1'))  # seconds
+    STARTUP_TIMEOUT = float(os.getenv('DB_STARTUP_TIMEOUT', '120'))  # seconds
+    VALIDATE_IDLE_SECONDS = float(os.getenv('DB_VALIDATE_IDLE_SECONDS', '30'))
+    EXPLAIN_CONNECT_TIMEOUT = 5  # seconds
+    # Conexiones que cada componente puede tener a la vez; la compartida de get_connection() siempre está
+    _reserved_connections = {"shared": 1}
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            cls._instance._initialize_connection()
+            cls._instance.breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv('DB_BREAKER_FAILURE_THRESHOLD', '5')),
+                reset_timeout=float(os.getenv('DB_BREAKER_RESET_TIMEOUT', '5')),
+                max_reset_timeout=float(os.getenv('DB_BREAKER_MAX_RESET_TIMEOUT', '60'))
+            )
+            cls._instance.pool = None
+            cls._instance.connection = None
+            cls._instance._explain_connection = None
+            cls._instance._local = threading.local()
+            cls._instance._pool_lock = threading.Lock()
+            query_profiler.explainer = cls._instance.explain
+            cls._instance.last_used = 0.0
         return cls._instance
     
-    def _initialize_connection(self, retry_count: int = 0):
+    @classmethod
+    def reserve_connections(cls, owner: str, count: int) -> None:
+        """Declare how many pooled connections owner may hold at once; the pool is sized to the sum"""
+        cls._reserved_connections[owner] = count
+    
+    @classmethod
+    def pool_size(cls) -> int:
+        return int(cls.POOL_SIZE) if cls.POOL_SIZE else sum(cls._reserved_connections.values())
+    
+    @staticmethod
+    def _db_config() -> Dict[str, Any]:
+        return {
+            "host": os.getenv('DB_HOST', 'mysql'),
+            "port": os.getenv('DB_PORT', '3306'),
+            "database": os.getenv('DB_NAME', 'taskdb'),
+            "user": os.getenv('DB_USER', 'taskuser'),
+            "password": os.getenv('DB_PASSWORD', 'taskpassword'),
+            "connection_timeout": 30,
+            "buffered": True,
+            "autocommit": False
+        }
+    
+    def _initialize_connection(self):
+        """Open the shared connection once, without retrying; retries belong to warm_up and the circuit breaker"""
+        dead, self.connection = self.connection, None
+        self.connection = self._acquire(replacing=dead) if dead is not None else self._acquire()
+        self.last_used = time.monotonic()
+        logger.info("Database connection established successfully")
+    
+    def _acquire(self, replacing=None):
+        """Take a connection from the pool, or open a new one in place of a dead one,
+        mapping connector errors to DatabaseErrorException"""
         try:
-            self.connection = mysql.connector.connect(
-                host=os.getenv('DB_HOST', 'mysql'),
-                port=os.getenv('DB_PORT', '3306'),
-                database=os.getenv('DB_NAME', 'taskdb'),
-                user=os.getenv('DB_USER', 'taskuser'),
-                password=os.getenv('DB_PASSWORD', 'taskpassword'),
-                connection_timeout=30,
-                pool_size=5,
-                buffered=True,
-                autocommit=False 
-            )
-            logger.info("Database connection established successfully")
-        except InterfaceError as e:
+            with self._pool_lock:
+                if self.pool is None:
+                    self.pool = ConnectionPool(self.pool_size(), self.VALIDATE_IDLE_SECONDS, self.POOL_TIMEOUT, **self._db_config())
+            if replacing is not None:
+                return self.pool.replace(replacing)
+            return self.pool.acquire()
+        except PoolError as e:
+            raise self._pool_exhausted(e)
+        except Error as e:
+            if not is_transient_error(e):
+                raise self._connection_error(e)
             logger.error(f"Interface error connecting to MySQL: {e}")
-            if retry_count < self.MAX_RETRIES:
-                logger.info(f"Retrying connection in {self.RETRY_DELAY} seconds... (Attempt {retry_count + 1}/{self.MAX_RETRIES})")
-                time.sleep(self.RETRY_DELAY)
-                return self._initialize_connection(retry_count + 1)
             raise DatabaseErrorException(
                 message="Database service unavailable. Please try again later.",
                 status_code=503,
                 error_code="DB_CONNECTION_FAILED"
             )
+    
+    @staticmethod
+    def _pool_exhausted(e: PoolError) -> DatabaseErrorException:
+        logger.error(f"Connection pool error: {e}")
+        return DatabaseErrorException(
+            message="Database service unavailable. Please try again later.",
+            status_code=503,
+            error_code="DB_POOL_EXHAUSTED",
+            retry_after=1
+        )
+    
+    @staticmethod
+    def _connection_error(e: Error) -> DatabaseErrorException:
+        logger.error(f"Error connecting to MySQL: {e}")
+        error_msg = str(e)
+        if "Access denied" in error_msg:
+            return DatabaseErrorException(
+                message="Database authentication failed",
+                status_code=401,
+                error_code="DB_AUTH_FAILED"
+            )
+        elif "Unknown database" in error_msg:
+            return DatabaseErrorException(
+                message="Database not found",
+                status_code=404,
+                error_code="DB_NOT_FOUND"
+            )
+        else:
+            return DatabaseErrorException(
+                message=f"Database connection error: {error_msg}",
+                status_code=500,
+                error_code="DB_CONNECTION_ERROR"
+            )
+    
+    def warm_up(self, statements: Sequence[Tuple[str, Optional[tuple]]] = (), timeout: Optional[float] = None) -> None:
+        """Connect with backoff, pre-fill the pool and run the hot statements on every connection"""
+        deadline = time.monotonic() + (self.STARTUP_TIMEOUT if timeout is None else timeout)
+        delay = self.RETRY_DELAY
+        attempt = 1
+        while True:
+            try:
+                self._initialize_connection()
+                break
+            except DatabaseErrorException as e:
+                # Solo se reintentan los errores transitorios (503)
+                if e.status_code != 503 or time.monotonic() + delay > deadline:
+                    raise
+                logger.info(f"Database not ready, retrying in {delay} seconds... (Attempt {attempt})")
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+                attempt += 1
+        def prepare(connection):
+            cursor = connection.cursor(dictionary=True)
+            try:
+                for query, params in statements:
+                    cursor.execute(query, params)
+                    cursor.fetchall()
+            finally:
+                cursor.close()
+            # No dejar un snapshot abierto en la conexión
+            connection.rollback()
+        prepare(self.connection)
+        opened = self.pool.fill(prepare)
+        logger.info(f"Connection pool pre-filled with {opened + 1} connections")
+        logger.info(f"Warmed up {len(statements)} statements on {opened + 1} connections")
+    
+    @contextmanager
+    def checkout(self):
+        """Bind a pooled connection to the current thread for one unit of work.
+
+        While bound, get_connection() returns it instead of the shared connection, so
+        TaskCRUD can run concurrently from worker threads without sharing a connection.
+        """
+        self._local.connection = self._guarded(self._acquire)
+        self._local.connection.completed_statements = 0
+        try:
+            yield self._local.connection
+        except BaseException as e:
+            connection = self._local.connection
+            self._local.connection = None
+            if connection is not None:
+                if self._connection_failed(e, connection):
+                    # El pool es LIFO: devolverla haría que el siguiente en llegar recibiera el mismo socket muerto
+                    logger.warning(f"Discarding connection after failed unit of work: {e}")
+                    self.pool.discard(connection)
+                    self.pool.invalidate_idle()
+                    self.breaker.record_failure()
+                else:
+                    self._release(connection)
+            raise
+        else:
+            connection = self._local.connection
+            self._local.connection = None
+            if connection is None:
+                return
+            # Solo cuenta como éxito si MySQL respondió a alguna sentencia de la unidad de trabajo
+            if connection.completed_statements:
+                self.breaker.record_success()
+            self._release(connection)
+    
+    @staticmethod
+    def _connection_failed(e: BaseException, connection) -> bool:
+        """Whether the connection must be thrown away after the unit of work raised e"""
+        # TaskCRUD envuelve el error del conector en DatabaseErrorException
+        cause = e.__context__ if isinstance(e, DatabaseErrorException) else e
+        if isinstance(cause, Error) and is_connection_lost(cause):
+            return True
+        if isinstance(e, DatabaseErrorException) and e.status_code < 500:
+            return False
+        try:
+            return not connection.is_connected()
+        except Exception:
+            return True
+    
+    def _release(self, connection) -> None:
+        try:
+            # No devolver al pool una conexión con un snapshot abierto
+            if connection.in_transaction:
+                connection.rollback()
+            self.pool.release(connection)
+        except Error as e:
+            logger.warning(f"Discarding connection on release: {e}")
+            self.pool.discard(connection)
+    
+    def reconnect(self):
+        """Replace the current connection with a newly opened one after a query found it dead.
+
+        After a MySQL restart every idle pooled connection is dead too, so the retry never
+        reuses one; they are pinged on their next checkout instead.
+        """
+        def _reconnect():
+            bound = getattr(self._local, "connection", None)
+            if bound is None:
+                self._initialize_connection()
+                return self.connection
+            self._local.connection = None
+            self._local.connection = self._acquire(replacing=bound)
+            return self._local.connection
+        return self._guarded(_reconnect)
+    
+    def explain(self, statement: str, params=None) -> List[Dict[str, Any]]:
+        """EXPLAIN a statement for the profiler's slow query log.
+
+        Runs on a dedicated connection outside the request pool, and is skipped unless the
+        circuit breaker is closed so the profiler never adds connects to a struggling database.
+        """
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            raise DatabaseErrorException(
+                message="EXPLAIN skipped while the database is unavailable",
+                status_code=503,
+                error_code="DB_CIRCUIT_OPEN"
+            )
+        return self._guarded(lambda: self._explain(statement, params))
+    
+    def _explain(self, statement: str, params) -> List[Dict[str, Any]]:
+        # Solo lo llama el hilo del profiler, así que la conexión no se comparte entre hilos
+        try:
+            if self._explain_connection is None or not self._explain_connection.is_connected():
+                self._close_explain_connection()
+                config = self._db_config()
+                config.update(connection_timeout=self.EXPLAIN_CONNECT_TIMEOUT, autocommit=True)
+                self._explain_connection = mysql.connector.connect(**config)
+            cursor = self._explain_connection.cursor(dictionary=True)
+            try:
+                cursor.execute(f"EXPLAIN {statement}", params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
         except Error as e:
-            logger.error(f"Error connecting to MySQL: {e}")
-            error_msg = str(e)
-            if "Access denied" in error_msg:
-                raise DatabaseErrorException(
-                    message="Database authentication failed",
-                    status_code=401,
-                    error_code="DB_AUTH_FAILED"
-                )
-            elif "Unknown database" in error_msg:
-                raise DatabaseErrorException(
-                    message="Database not found",
-                    status_code=404,
-                    error_code="DB_NOT_FOUND"
-                )
+            if not is_transient_error(e):
+                raise
+            self._close_explain_connection()
+            logger.warning(f"EXPLAIN connection failed: {e}")
+            raise DatabaseErrorException(
+                message="Database service unavailable. Please try again later.",
+                status_code=503,
+                error_code="DB_CONNECTION_FAILED"
+            )
+    
+    def _close_explain_connection(self) -> None:
+        if self._explain_connection is not None:
+            ConnectionPool._close(self._explain_connection)
+            self._explain_connection = None
+    
+    def _guarded(self, func):
+        """Run func once the circuit breaker lets it through.
+
+        Getting a connection is not evidence that MySQL is up, so only failed connects and
+        pings inside func are counted; the half-open trial is a SELECT 1 round trip.
+        """
+        if self.breaker.before_call():
+            self._probe(self._check_health, trial=True)
+        try:
+            return func()
+        except DatabaseErrorException as e:
+            if e.error_code in ("DB_CONNECTION_FAILED", "DB_CONNECTION_LOST"):
+                self.breaker.record_failure()
+            raise
+    
+    def _probe(self, func, trial: bool = False):
+        """Run a round trip to MySQL and record its outcome in the circuit breaker"""
+        try:
+            result = func()
+        except DatabaseErrorException as e:
+            # Un pool agotado no dice nada de la base de datos
+            if e.error_code == "DB_POOL_EXHAUSTED":
+                self.breaker.release_trial()
             else:
-                raise DatabaseErrorException(
-                    message=f"Database connection error: {error_msg}",
-                    status_code=500,
-                    error_code="DB_CONNECTION_ERROR"
-                )
+                self.breaker.record_failure(trial=trial)
+            raise
+        self.breaker.record_success()
+        return result
+    
+    def pool_snapshot(self) -> Dict[str, Any]:
+        if self.pool is None:
+            return {"size": self.pool_size(), "opened": 0, "idle": 0}
+        return self.pool.snapshot()
+    
+    def check_health(self) -> float:
+        """Run SELECT 1 on a pooled connection other than the shared one, returns latency in ms"""
+        trial = self.breaker.before_call()
+        return self._probe(self._check_health, trial=trial)
+    
+    def _check_health(self) -> float:
+        if self.pool is None:
+            self._initialize_connection()
+        start = time.perf_counter()
+        connection = None
+        try:
+            connection = self.pool.acquire()
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                result = cursor.fetchone()
+            finally:
+                cursor.close()
+            connection.rollback()
+        except PoolError as e:
+            raise self._pool_exhausted(e)
+        except Error as e:
+            if connection is not None:
+                self.pool.discard(connection)
+            logger.error(f"Health check query failed: {e}")
+            raise DatabaseErrorException(
+                message="Database health check failed",
+                status_code=503,
+                error_code="DB_HEALTH_CHECK_FAILED"
+            )
+        self.pool.release(connection)
+        if not result or result[0] != 1:
+            raise DatabaseErrorException(
+                message="Database health check returned an unexpected result",
+                status_code=503,
+                error_code="DB_HEALTH_QUERY_FAILED"
+            )
+        return (time.perf_counter() - start) * 1000
     
     def get_connection(self):
+        """Return the shared connection, pinging it only if it sat idle past VALIDATE_IDLE_SECONDS.
+
+        Fails fast with a 503 while the circuit breaker is open; reconnecting never sleeps on the request path.
+        """
+        return self._guarded(self._get_connection)
+    
+    def _get_connection(self):
+        bound = getattr(self._local, "connection", None)
+        if bound is not None:
+            return bound
         try:
-            if self.connection and self.connection.is_connected():
-                self.connection.ping(reconnect=True, attempts=1, delay=0)
-                return self.connection
-            else:
-                logger.warning("Connection lost, reinitializing...")
+            if self.connection is None:
                 self._initialize_connection()
                 return self.connection
+            now = time.monotonic()
+            if now - self.last_used > self.VALIDATE_IDLE_SECONDS:
+                try:
+                    self.connection.ping(reconnect=True, attempts=1, delay=0)
+                except Error as e:
+                    logger.warning(f"Connection lost, reinitializing... ({e})")
+                    self._initialize_connection()
+            self.last_used = now
+            return self.connection
         except Error as e:
             logger.error(f"Error getting database connection: {e}")
             raise DatabaseErrorException(
@@ -136,6 +696,10 @@ class DatabaseConnection:
             if self.connection and self.connection.is_connected():
                 self.connection.close()
                 logger.info("Database connection closed successfully")
+            self.connection = None
+            self._close_explain_connection()
+            if self.pool:
+                self.pool.close_all()
         except Error as e:
             logger.error(f"Error closing database connection: {e}")
 
@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Optional, Dict, Any, Callable
+from datetime import datetime
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_STDLIB_DIR = os.path.dirname(os.path.abspath(threading.__file__))
+
+# Sentencias a las que se les puede pedir EXPLAIN
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+class QueryProfiler:
+    """Times every statement run through a ProfiledCursor.
+
+    Keeps per (caller, statement) totals and a ring buffer of the most recent queries
+    slower than slow_query_ms. With explain on, their EXPLAIN plans are captured on a
+    background thread.
+    """
+    def __init__(self, slow_query_ms: float = 100, ring_size: int = 50, explain: bool = False):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.explain = explain
+        self.stats: Dict[tuple, Dict[str, Any]] = {}
+        self.slow_queries = deque(maxlen=ring_size)
+        self.explainer: Optional[Callable] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._pending_explains = 0
+
+    @staticmethod
+    def _caller() -> str:
+        """Nearest calling function outside the database layer and the _execute helpers.
+
+        Statements issued by the database layer itself from a worker thread (health checks)
+        are attributed to the outermost database-layer function instead.
+        """
+        frame = sys._getframe(3)
+        fallback = "unknown"
+        while frame is not None:
+            code = frame.f_code
+            qualname = getattr(code, "co_qualname", code.co_name)
+            if code.co_filename.startswith(_STDLIB_DIR) and "site-packages" not in code.co_filename:
+                return fallback
+            if code.co_filename.startswith(_DATABASE_DIR):
+                fallback = qualname
+            elif not code.co_name.startswith("_execute"):
+                return qualname
+            frame = frame.f_back
+        return fallback
+
+    def record(self, statement: str, params, duration: float, rowcount: int) -> None:
+        if getattr(self._local, "suppressed", False):
+            return
+        caller = self._caller()
+        statement = " ".join(statement.split())
+        with self._lock:
+            entry = self.stats.get((caller, statement))
+            if entry is None:
+                entry = self.stats[(caller, statement)] = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "rows": 0}
+            entry["count"] += 1
+            entry["total_seconds"] += duration
+            entry["max_seconds"] = max(entry["max_seconds"], duration)
+            entry["rows"] += max(rowcount or 0, 0)
+        if duration < self.slow_query_seconds:
+            return
+        slow = {
+            "caller": caller,
+            "statement": statement,
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rowcount,
+            "at": datetime.now().isoformat(),
+            "explain": None
+        }
+        self.slow_queries.append(slow)
+        logger.warning(f"Slow query in {caller} ({slow['duration_ms']} ms): {statement}")
+        if not self.explain or not self.explainer or statement.split(" ", 1)[0].upper() not in EXPLAINABLE:
+            return
+        with self._lock:
+            # No acumular EXPLAINs si la base de datos ya va lenta
+            if self._pending_explains >= 8:
+                return
+            self._pending_explains += 1
+        self._executor.submit(self._explain, slow, statement, params)
+
+    def _explain(self, slow: Dict[str, Any], statement: str, params) -> None:
+        self._local.suppressed = True
+        try:
+            slow["explain"] = self.explainer(statement, params)
+        except Exception as e:
+            slow["explain"] = {"error": str(e)}
+        finally:
+            self._local.suppressed = False
+            with self._lock:
+                self._pending_explains -= 1
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            stats = sorted(self.stats.items(), key=lambda item: item[1]["total_seconds"], reverse=True)[:limit]
+        return {
+            "slow_query_ms": self.slow_query_seconds * 1000,
+            "slow_queries": sorted(self.slow_queries, key=lambda q: q["duration_ms"], reverse=True),
+            "statements": [
+                {
+                    "caller": caller,
+                    "statement": statement,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_seconds"] * 1000, 3),
+                    "avg_ms": round(entry["total_seconds"] * 1000 / entry["count"], 3),
+                    "max_ms": round(entry["max_seconds"] * 1000, 3),
+                    "rows": entry["rows"]
+                }
+                for (caller, statement), entry in stats
+            ]
+        }
+
+
+class ProfiledCursor:
+    """Cursor proxy that reports every execute() to the profiler"""
+    def __init__(self, cursor, profiler: QueryProfiler, connection: "ProfiledConnection"):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._connection = connection
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._profiler.record(operation, params, time.perf_counter() - start, self._cursor.rowcount)
+        self._connection.completed_statements += 1
+        return result
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """Connection proxy whose cursors are profiled.
+
+    completed_statements counts the statements MySQL answered, so callers can tell a
+    connection that was used from one that was only handed out.
+    """
+    def __init__(self, connection, profiler: QueryProfiler):
+        self._connection = connection
+        self._profiler = profiler
+        self.completed_statements = 0
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._connection.cursor(*args, **kwargs), self._profiler, self)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+query_profiler = QueryProfiler(
+    slow_query_ms=float(os.getenv('SLOW_QUERY_MS', '100')),
+    ring_size=int(os.getenv('SLOW_QUERY_RING_SIZE', '50')),
+    explain=os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() == 'true'
+)
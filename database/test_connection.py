@@ -0,0 +1,335 @@
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import DatabaseError, OperationalError, PoolError, ProgrammingError, errorcode
+import pytest
+
+from database.connection import CircuitBreaker, ConnectionPool, DatabaseConnection, DatabaseErrorException
+
+
+def expire(breaker: CircuitBreaker) -> None:
+    """Move the breaker past its reset timeout"""
+    breaker.opened_at -= breaker.current_timeout
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        if self.connection.dead or not FakeConnection.server_up:
+            self.connection.dead = True
+            raise OperationalError(msg="Lost connection to MySQL server during query", errno=errorcode.CR_SERVER_LOST)
+        self.connection.statements.append(query)
+        self.connection.in_transaction = True
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Stands in for a mysql.connector connection; a dead one fails like a socket MySQL closed"""
+    server_up = True
+
+    def __init__(self, **config):
+        if not FakeConnection.server_up:
+            raise DatabaseError(msg="Can't connect to MySQL server", errno=errorcode.CR_CONN_HOST_ERROR)
+        self.dead = False
+        self.in_transaction = False
+        self.statements = []
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.dead:
+            raise OperationalError(msg="MySQL server has gone away", errno=errorcode.CR_SERVER_GONE_ERROR)
+        self.in_transaction = False
+
+    def ping(self, **kwargs):
+        if self.dead or not FakeConnection.server_up:
+            self.dead = True
+            raise OperationalError(msg="MySQL server has gone away", errno=errorcode.CR_SERVER_GONE_ERROR)
+
+    def is_connected(self):
+        return not self.dead and FakeConnection.server_up
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    monkeypatch.setattr(mysql.connector, "connect", FakeConnection)
+    monkeypatch.setattr(FakeConnection, "server_up", True)
+
+
+@pytest.fixture
+def db(connector, monkeypatch):
+    monkeypatch.setattr(DatabaseConnection, "_instance", None)
+    monkeypatch.setattr(DatabaseConnection, "_reserved_connections", {"shared": 1, "requests": 4, "health": 1})
+    monkeypatch.setattr(DatabaseConnection, "POOL_SIZE", None)
+    db = DatabaseConnection()
+    yield db
+    db.close_connection()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 1
+
+
+def test_open_breaker_rejects_calls_with_retry_after():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    with pytest.raises(DatabaseErrorException) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.error_code == "DB_CIRCUIT_OPEN"
+    assert 1 <= excinfo.value.retry_after <= 10
+    assert breaker.rejected_calls == 1
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.before_call() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(DatabaseErrorException):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_reopens_with_longer_backoff():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=4, max_reset_timeout=10)
+    breaker.record_failure()
+    assert 2 <= breaker.current_timeout <= 4
+    for _ in range(3):
+        expire(breaker)
+        assert breaker.before_call() is True
+        breaker.record_failure(trial=True)
+        assert breaker.state == CircuitBreaker.OPEN
+    # 4, 8, 16 y 32 segundos, limitados a 10 y con jitter sobre la mitad superior
+    assert 5 <= breaker.current_timeout <= 10
+
+
+def test_failures_after_opening_keep_the_first_backoff():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=5, max_reset_timeout=60)
+    # Llamadas que ya estaban en curso cuando se abrió el circuito
+    for _ in range(9):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert (breaker.times_opened, breaker.consecutive_opens) == (1, 1)
+    assert 2.5 <= breaker.current_timeout <= 5
+
+
+def test_only_the_trial_failure_reopens_a_half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.before_call() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure(trial=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_released_trial_can_be_taken_again():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.before_call() is True
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.before_call() is True
+
+
+def test_checkout_does_not_count_as_success(db):
+    db.warm_up(timeout=0)
+    for _ in range(2):
+        db.breaker.record_failure()
+    with db.checkout():
+        pass
+    # El cuerpo no llegó a MySQL, pero la entrega de la conexión tampoco es un éxito
+    assert db.breaker.consecutive_failures == 2
+
+
+def test_answered_statement_counts_as_success(db):
+    db.warm_up(timeout=0)
+    for _ in range(2):
+        db.breaker.record_failure()
+    with db.checkout() as connection:
+        connection.cursor().execute("SELECT * FROM tasks WHERE id = %s", (1,))
+    assert db.breaker.consecutive_failures == 0
+
+
+def test_half_open_trial_is_a_real_round_trip(db):
+    db.warm_up(timeout=0)
+    FakeConnection.server_up = False
+    db.breaker._open()
+    expire(db.breaker)
+    with pytest.raises(DatabaseErrorException):
+        with db.checkout():
+            pass
+    assert db.breaker.state == CircuitBreaker.OPEN
+
+    FakeConnection.server_up = True
+    expire(db.breaker)
+    with db.checkout():
+        pass
+    assert db.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_lost_connection_on_write_counts_as_failure(db):
+    db.warm_up(timeout=0)
+    with pytest.raises(OperationalError):
+        with db.checkout() as connection:
+            connection._connection.dead = True
+            connection.cursor().execute("INSERT INTO tasks (name, price) VALUES (%s, %s)", ("a", 1))
+    assert db.breaker.consecutive_failures == 1
+
+
+def test_outage_opens_the_breaker(db):
+    db.warm_up(timeout=0)
+    FakeConnection.server_up = False
+    errors = []
+    for _ in range(8):
+        try:
+            with db.checkout() as connection:
+                connection.cursor().execute("SELECT * FROM tasks WHERE id = %s", (1,))
+        except (DatabaseErrorException, DatabaseError) as e:
+            errors.append(getattr(e, "error_code", None))
+    assert db.breaker.state == CircuitBreaker.OPEN
+    assert errors[-1] == "DB_CIRCUIT_OPEN"
+
+
+def test_acquire_waits_for_a_released_connection(connector):
+    pool = ConnectionPool(1, timeout=1)
+    connection = pool.acquire()
+    threading.Timer(0.05, pool.release, (connection,)).start()
+    assert pool.acquire() is connection
+
+
+def test_acquire_gives_up_after_timeout(connector):
+    pool = ConnectionPool(1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolError):
+        pool.acquire()
+
+
+def test_fill_stops_when_requests_take_the_last_slot(connector):
+    pool = ConnectionPool(3)
+    held = []
+    def prepare(connection):
+        # Una request abre una conexión mientras se llena el pool
+        if not held:
+            held.append(pool.acquire())
+    assert pool.fill(prepare) == 2
+    assert pool.snapshot() == {"size": 3, "opened": 3, "idle": 2}
+
+
+def test_pool_exhaustion_does_not_open_the_breaker(db, monkeypatch):
+    monkeypatch.setattr(DatabaseConnection, "POOL_TIMEOUT", 0.01)
+    db.warm_up(timeout=0)
+    held = [db.pool.acquire() for _ in range(db.pool.size - 1)]
+    for _ in range(db.breaker.failure_threshold + 1):
+        with pytest.raises(DatabaseErrorException) as excinfo:
+            with db.checkout():
+                pass
+        assert excinfo.value.error_code == "DB_POOL_EXHAUSTED"
+    assert db.breaker.state == CircuitBreaker.CLOSED
+    db.pool.release(held.pop())
+    with db.checkout():
+        pass
+
+
+def test_checkout_discards_a_dead_connection(db):
+    db.warm_up(timeout=0)
+    with pytest.raises(OperationalError):
+        with db.checkout() as connection:
+            dead = connection
+            connection._connection.dead = True
+            connection.cursor().execute("SELECT * FROM tasks WHERE id = %s", (1,))
+    assert dead not in db.pool.drain()
+
+
+def test_reconnect_opens_a_new_connection_after_a_restart(db):
+    db.warm_up(timeout=0)
+    # Tras reiniciar MySQL todos los sockets del pool están muertos
+    for connection in db.pool.drain():
+        connection._connection.dead = True
+        db.pool.release(connection)
+    with db.checkout() as connection:
+        with pytest.raises(OperationalError):
+            connection.cursor().execute("SELECT * FROM tasks WHERE id = %s", (1,))
+        fresh = db.reconnect()
+        fresh.cursor().execute("SELECT * FROM tasks WHERE id = %s", (1,))
+    assert db.breaker.consecutive_failures == 0
+    with db.checkout() as connection:
+        connection.cursor().execute("SELECT * FROM tasks WHERE id = %s", (1,))
+
+
+def test_warm_up_prepares_every_pooled_connection(db):
+    statements = (("SELECT * FROM tasks WHERE id = %s", (0,)), ("SELECT 1", None))
+    db.warm_up(statements, timeout=0)
+    connections = [db.connection] + db.pool.drain()
+    assert len(connections) == db.pool_size()
+    for connection in connections:
+        assert connection._connection.statements == [query for query, _ in statements]
+        assert not connection.in_transaction
+
+
+def test_warm_up_retries_until_the_database_is_reachable(db, monkeypatch):
+    monkeypatch.setattr(DatabaseConnection, "RETRY_DELAY", 0.01)
+    attempts = []
+    def connect(**config):
+        attempts.append(config)
+        FakeConnection.server_up = len(attempts) > 2
+        return FakeConnection(**config)
+    monkeypatch.setattr(mysql.connector, "connect", connect)
+    db.warm_up(timeout=5)
+    assert db.connection is not None
+    assert len(attempts) == 2 + db.pool_size()
+
+
+def test_warm_up_does_not_retry_non_transient_errors(db, monkeypatch):
+    def connect(**config):
+        raise ProgrammingError(msg="Access denied for user 'taskuser'", errno=errorcode.ER_ACCESS_DENIED_ERROR)
+    monkeypatch.setattr(mysql.connector, "connect", connect)
+    sleeps = []
+    monkeypatch.setattr("database.connection.time.sleep", sleeps.append)
+    with pytest.raises(DatabaseErrorException) as excinfo:
+        db.warm_up(timeout=5)
+    assert excinfo.value.error_code == "DB_AUTH_FAILED"
+    assert sleeps == []
+
+
+def test_warm_up_gives_up_at_the_deadline(db, monkeypatch):
+    monkeypatch.setattr(DatabaseConnection, "RETRY_DELAY", 0.01)
+    monkeypatch.setattr(DatabaseConnection, "MAX_RETRY_DELAY", 0.02)
+    FakeConnection.server_up = False
+    start = time.monotonic()
+    with pytest.raises(DatabaseErrorException) as excinfo:
+        db.warm_up(timeout=0.1)
+    assert excinfo.value.status_code == 503
+    assert time.monotonic() - start < 0.5
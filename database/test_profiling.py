@@ -0,0 +1,82 @@
+import os
+import threading
+
+from database import profiling
+from database.profiling import QueryProfiler, ProfiledConnection
+
+
+class FakeCursor:
+    rowcount = 1
+
+    def execute(self, operation, params=None):
+        pass
+
+
+class FakeConnection:
+    def cursor(self, **kwargs):
+        return FakeCursor()
+
+
+def list_tasks(connection):
+    cursor = connection.cursor()
+    _execute_query(cursor)
+
+
+def _execute_query(cursor):
+    database_layer_execute(cursor, "SELECT *\n  FROM tasks")
+
+
+def test_statements_are_attributed_to_the_caller_outside_execute_helpers(monkeypatch):
+    # Este fichero vive en database/; la capa de base de datos pasa a ser un directorio ficticio
+    layer = os.path.join(profiling._DATABASE_DIR, "layer")
+    monkeypatch.setattr(profiling, "_DATABASE_DIR", layer)
+    namespace = {}
+    exec(compile("def execute(cursor, statement):\n    cursor.execute(statement)\n",
+                 os.path.join(layer, "crud.py"), "exec"), namespace)
+    monkeypatch.setitem(globals(), "database_layer_execute", namespace["execute"])
+    profiler = QueryProfiler(slow_query_ms=1000)
+    list_tasks(ProfiledConnection(FakeConnection(), profiler))
+    list_tasks(ProfiledConnection(FakeConnection(), profiler))
+    [statement] = profiler.snapshot()["statements"]
+    assert statement["caller"] == "list_tasks"
+    assert statement["statement"] == "SELECT * FROM tasks"
+    assert (statement["count"], statement["rows"]) == (2, 2)
+
+
+def test_slow_queries_ring_buffer_keeps_the_most_recent():
+    profiler = QueryProfiler(slow_query_ms=10, ring_size=2)
+    profiler.record("SELECT 1", None, 0.001, 1)
+    for n in range(3):
+        profiler.record(f"SELECT {n + 2}", None, 0.02 + n / 1000, 1)
+    assert [q["statement"] for q in profiler.slow_queries] == ["SELECT 3", "SELECT 4"]
+
+
+def test_slow_queries_are_not_explained_by_default():
+    profiler = QueryProfiler(slow_query_ms=0)
+    explained = []
+    profiler.explainer = lambda statement, params: explained.append(statement)
+    profiler.record("SELECT 1", None, 0.5, 1)
+    profiler._executor.shutdown(wait=True)
+    assert explained == []
+    assert profiler.slow_queries[0]["explain"] is None
+
+
+def test_no_more_than_eight_explains_are_pending():
+    profiler = QueryProfiler(slow_query_ms=0, explain=True)
+    release = threading.Event()
+    explained = []
+    def explainer(statement, params):
+        release.wait(5)
+        explained.append(statement)
+        return {"plan": statement}
+    profiler.explainer = explainer
+    for n in range(10):
+        profiler.record(f"SELECT {n}", None, 0.5, 1)
+    # SHOW no admite EXPLAIN y no ocupa sitio
+    profiler.record("SHOW TABLES", None, 0.5, 1)
+    assert profiler._pending_explains == 8
+    release.set()
+    profiler._executor.shutdown(wait=True)
+    assert explained == [f"SELECT {n}" for n in range(8)]
+    assert profiler._pending_explains == 0
+    assert [q["explain"] is None for q in profiler.slow_queries] == [False] * 8 + [True] * 3
@@ -2,7 +2,14 @@ from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from app.api import router
+from app.startup import warm_up, stop_warm_up
+from app.health import prober
+from app.profiling import request_profiler, current_profile
+from database.connection import DatabaseConnection
+from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 import traceback
 
 # Configurar logging
@@ -12,13 +19,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def startup(app: FastAPI):
+    await asyncio.to_thread(warm_up, app)
+    prober.start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El warm-up corre en segundo plano para que /health/live responda mientras tanto
+    app.state.startup_task = asyncio.create_task(startup(app))
+    yield
+    app.state.startup_task.cancel()
+    stop_warm_up()
+    await prober.stop()
+    DatabaseConnection().close_connection()
+
 app = FastAPI(
     title="Task Management API",
     description="A simple API for managing tasks with MySQL database",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # Middleware para logging de requests
@@ -33,6 +55,23 @@ async def log_requests(request: Request, call_next):
         logger.error(f"Request error: {str(e)}")
         raise
 
+# Middleware de profiling para una muestra de las requests con la cabecera X-Profile
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    profile = request_profiler.start(request)
+    if profile is None:
+        return await call_next(request)
+    token = current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        # Solo se perfila el trabajo en el hilo del worker (profile_worker_thread)
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+        request_profiler.finish(profile, (time.perf_counter() - start) * 1000)
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
 # Manejo global de excepciones de validación
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -71,7 +110,9 @@ async def root():
         "message": "Welcome to Task Management API",
         "docs": "/docs",
         "redoc": "/redoc",
-        "health_check": "/items/health/check"
+        "health_check": "/items/health/check",
+        "liveness": "/items/health/live",
+        "readiness": "/items/health/ready"
     }
 
 if __name__ == "__main__":